@@ -1,10 +1,12 @@
 import os
 import sys
+import atexit
+import asyncio
 import time
 import logging
 import datetime
 
-from typing import Annotated, TypedDict, List, Literal, Tuple
+from typing import Annotated, TypedDict, Dict, List, Literal, Optional, Tuple
 
 from dotenv import load_dotenv
 
@@ -14,11 +16,20 @@ from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.memory import BaseCheckpointSaver
 
-from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_core.tools import tool, BaseTool
 from langchain_groq import ChatGroq
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+from .llm_router import build_router_from_env
+from .resilience import CircuitBreaker, ResilientTool, ServerSupervisor, http_server_commands
+from .tool_selection import ToolSelector
+from .planner import (
+    ASK_USER_SIGNAL, PLAN_EXECUTOR, MAX_REPLANS, PLANNER_INSTRUCTION, Plan, PlanStep, UnresolvedReference,
+    describe_tools, is_failed_result, is_read_only, message_text, plan_waves, resolve_args,
+)
+
 logger = logging.getLogger("AGENT")
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -55,32 +66,106 @@ def summarize_case(key_findings: List[str], next_steps: str) -> str:
     return f"CASE SUMMARY:\nFindings: {'; '.join(key_findings)}\nNext Steps: {next_steps}"
 
 
-async def load_mcp_tools() -> Tuple[List[BaseTool], MultiServerMCPClient]:
-    """Connects to the 3 separate MCP servers using absolute paths."""
-
-    def get_server_args(script_name: str) -> List[str]:
-        return [os.path.join(SERVER_DIR, script_name)]
-
-    client = MultiServerMCPClient({
-        "crm": {
-            "command": sys.executable,
-            "args": get_server_args("server_crm.py"),
-            "transport": "stdio",
-        },
-        "oms": {
-            "command": sys.executable,
-            "args": get_server_args("server_oms.py"),
-            "transport": "stdio",
-        },
-        "comms": {
-            "command": sys.executable,
-            "args": get_server_args("server_comms.py"),
-            "transport": "stdio",
+MCP_SERVERS = {
+    "crm": ("server_crm.py", 8001),
+    "oms": ("server_oms.py", 8002),
+    "comms": ("server_comms.py", 8003),
+}
+
+
+def get_server_connection(name: str) -> dict:
+    """Spawns the server over stdio, or connects to an already running shared HTTP server.
+
+    Set MCP_TRANSPORT=streamable_http to share one set of servers between several agent
+    processes; MCP_<NAME>_URL overrides the default http://MCP_HOST:<port>/mcp address.
+    """
+    script_name, port = MCP_SERVERS[name]
+
+    if os.getenv("MCP_TRANSPORT", "stdio") == "streamable_http":
+        host = os.getenv("MCP_HOST", "127.0.0.1")
+        return {
+            "transport": "streamable_http",
+            "url": os.getenv(f"MCP_{name.upper()}_URL", f"http://{host}:{port}/mcp"),
         }
-    })
+
+    return {
+        "command": sys.executable,
+        "args": [os.path.join(SERVER_DIR, script_name)],
+        "transport": "stdio",
+    }
+
+
+# Shared across Streamlit reruns, so breaker state and supervised processes outlive one script run.
+BREAKERS: Dict[str, CircuitBreaker] = {}
+_supervisor: Optional[ServerSupervisor] = None
+
+
+def get_supervisor() -> Optional[ServerSupervisor]:
+    """Starts (once) and returns the process supervisor when MCP_SPAWN_SERVERS=1 in HTTP mode."""
+    global _supervisor
+    if _supervisor is None and os.getenv("MCP_TRANSPORT") == "streamable_http" \
+            and os.getenv("MCP_SPAWN_SERVERS") == "1":
+        _supervisor = ServerSupervisor(http_server_commands(MCP_SERVERS, SERVER_DIR))
+        _supervisor.start()
+        # Otherwise the servers outlive the app and keep their ports on the next start
+        atexit.register(_supervisor.stop)
+    return _supervisor
+
+
+_comms_worker: Optional[ServerSupervisor] = None
+
+
+def get_comms_worker() -> Optional[ServerSupervisor]:
+    """Starts (once) the long-lived Comms outbox worker in stdio mode and returns its supervisor.
+
+    Over stdio each Comms tool call runs in its own short-lived server process, which only queues the
+    message, so delivery must come from a process that outlives the call. HTTP servers deliver themselves.
+    """
+    global _comms_worker
+    if _comms_worker is None and os.getenv("MCP_TRANSPORT", "stdio") == "stdio":
+        command = [sys.executable, os.path.join(SERVER_DIR, "comms_worker.py")]
+        _comms_worker = ServerSupervisor({"comms_worker": command})
+        _comms_worker.start()
+        atexit.register(_comms_worker.stop)
+    return _comms_worker
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in BREAKERS:
+        supervisor = get_supervisor()
+        BREAKERS[name] = CircuitBreaker(name, on_open=supervisor.restart if supervisor else None)
+    return BREAKERS[name]
+
+
+async def load_server_tools(client: MultiServerMCPClient, name: str) -> List[BaseTool]:
+    """Loads one server's tools, wrapped with deadlines, a circuit breaker and hedged retries."""
+    timeout = float(os.getenv("MCP_CALL_TIMEOUT", "20"))
+    hedge_delay = float(os.getenv("MCP_HEDGE_DELAY", "8"))
+
+    # Supervised servers may still be booting, so give them a few seconds to come up.
+    attempts = 15 if get_supervisor() else 1
+    for attempt in range(attempts):
+        try:
+            tools = await client.get_tools(server_name=name)
+            break
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(1)
+
+    breaker = get_breaker(name)
+    return [ResilientTool(t, name, breaker, timeout=timeout, hedge_delay=hedge_delay) for t in tools]
+
+
+async def load_mcp_tools() -> Tuple[List[BaseTool], MultiServerMCPClient]:
+    """Connects to the 3 separate MCP servers (local stdio subprocesses or shared HTTP servers)."""
+
+    client = MultiServerMCPClient({name: get_server_connection(name) for name in MCP_SERVERS})
 
     logger.info("Connecting to MCP Servers (CRM, OMS, Comms)...")
-    tools = await client.get_tools()
+    get_comms_worker()
+    per_server = await asyncio.gather(*(load_server_tools(client, name) for name in MCP_SERVERS))
+    tools = [t for server_tools in per_server for t in server_tools]
     all_tools = tools + [policy_lookup, get_current_date, summarize_case]
     logger.info(f"Loaded {len(tools)} MCP tools.")
     return all_tools, client
@@ -90,14 +175,37 @@ class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
 
 
-def build_graph(tools: List[BaseTool], checkpointer: BaseCheckpointSaver) -> CompiledStateGraph:
-    """Builds and compiles the LangGraph agent."""
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0,
-        api_key=gq_key
-    )
-    llm_with_tools = llm.bind_tools(tools)
+class PlanState(AgentState, total=False):
+    plan: List[dict]
+    replans: int
+    plan_invalidated: bool
+
+
+def build_graph(
+        tools: List[BaseTool],
+        checkpointer: BaseCheckpointSaver,
+        llm: Optional[BaseChatModel] = None,
+        step_delay: float = 2.0,
+        mode: str = "loop",
+) -> CompiledStateGraph:
+    """Builds and compiles the LangGraph agent.
+
+    `llm` defaults to Groq, or to a router across providers when LLM_PROVIDERS is set;
+    pass another chat model (e.g. a fake one for load tests) to replace it.
+    `step_delay` is the pause before every LLM call that keeps us under the Groq rate limit.
+    `mode="plan"` adds a planner that emits a DAG of read-only tool calls, runs each wave of it
+    concurrently and hands the results to the agent for one synthesis step (async only).
+    """
+    if llm is None:
+        llm = build_router_from_env()
+    if llm is None:
+        llm = ChatGroq(
+            model="llama-3.3-70b-versatile",
+            temperature=0,
+            api_key=gq_key
+        )
+    # Binds only the tools relevant to the current step (cached per subset)
+    tool_selector = ToolSelector(llm, tools)
 
     # ... inside build_graph ...
 
@@ -132,9 +240,10 @@ def build_graph(tools: List[BaseTool], checkpointer: BaseCheckpointSaver) -> Com
 
     def agent_node(state: AgentState) -> dict:
 
-        time.sleep(2)  # To not hit rate limiting
+        time.sleep(step_delay)  # To not hit rate limiting
 
         messages = state["messages"]
+        llm_with_tools, _ = tool_selector.bind(messages)
         if not isinstance(messages[0], SystemMessage):
             messages = [SystemMessage(content=SYSTEM_INSTRUCTION)] + messages
         response = llm_with_tools.invoke(messages)
@@ -146,11 +255,113 @@ def build_graph(tools: List[BaseTool], checkpointer: BaseCheckpointSaver) -> Com
             return "tools"
         return END
 
-    workflow = StateGraph(AgentState)
+    tool_node = ToolNode(tools)
+
+    if mode != "plan":
+        workflow = StateGraph(AgentState)
+        workflow.add_node("agent", agent_node)
+        workflow.add_node("tools", tool_node)
+
+        workflow.add_edge(START, "agent")
+        workflow.add_conditional_edges("agent", should_continue, ["tools", END])
+        workflow.add_edge("tools", "agent")
+
+        return workflow.compile(checkpointer=checkpointer, interrupt_before=["tools"])
+
+    # --- Plan-and-execute mode ---
+
+    planner_llm = llm.bind_tools([Plan])
+    read_only_names = {t.name for t in tools if is_read_only(t.name)}
+    planner_prompt = PLANNER_INSTRUCTION.format(tool_list=describe_tools(tools))
+
+    def planner_node(state: PlanState) -> dict:
+
+        time.sleep(step_delay)  # To not hit rate limiting
+
+        messages = state["messages"]
+        # A new user message starts a new ticket, so the re-plan budget starts over.
+        replans = 0 if isinstance(messages[-1], HumanMessage) else state.get("replans", 0) + 1
+
+        response = planner_llm.invoke([SystemMessage(content=planner_prompt)] + messages)
+        plan_calls = [c for c in getattr(response, "tool_calls", []) if c["name"] == Plan.__name__]
+        if not plan_calls:
+            logger.info("Planner: nothing to look up, going straight to the agent.")
+            return {"plan": [], "replans": replans, "plan_invalidated": False}
+
+        steps = []
+        for step in Plan(**plan_calls[0]["args"]).steps:
+            if step.tool in read_only_names:
+                steps.append(step.model_dump())
+            else:
+                logger.warning(f"Planner: dropping step {step.id} ({step.tool}), not a read-only tool.")
+        logger.info(f"Planner: {len(steps)} steps planned (re-plan #{replans}).")
+        return {"plan": steps, "replans": replans, "plan_invalidated": False}
+
+    async def executor_node(state: PlanState) -> dict:
+        steps = [PlanStep(**s) for s in state.get("plan", [])]
+        try:
+            waves = plan_waves(steps)
+        except ValueError as e:
+            logger.warning(f"Executor: invalid plan, {e}")
+            return {"plan": [], "plan_invalidated": True}
+
+        new_messages: List[BaseMessage] = []
+        results: Dict[str, str] = {}
+        # Steps that failed (e.g. AMBIGUOUS_MATCH) or were skipped; their dependents are skipped too.
+        failed: set = set()
+        skipped: List[str] = []
+        for wave in waves:
+            ready, tool_calls = [], []
+            for s in wave:
+                if any(d in failed for d in s.depends_on):
+                    failed.add(s.id)
+                    skipped.append(s.id)
+                    continue
+                try:
+                    args = resolve_args(s.args, results)
+                except UnresolvedReference as e:
+                    logger.info(f"Executor: skipping step {s.id}, {e}.")
+                    failed.add(s.id)
+                    skipped.append(s.id)
+                    continue
+                ready.append(s)
+                tool_calls.append({"name": s.tool, "args": args, "id": f"plan_{s.id}_{len(state['messages'])}"})
+            if not tool_calls:
+                continue
+
+            wave_request = AIMessage(content="", name=PLAN_EXECUTOR, tool_calls=tool_calls)
+            output = await tool_node.ainvoke({"messages": [wave_request]})
+            new_messages += [wave_request] + output["messages"]
+
+            for step, result in zip(ready, output["messages"]):
+                results[step.id] = message_text(result)
+                if is_failed_result(results[step.id]):
+                    failed.add(step.id)
+
+        # A failed leaf step is just an answer ("not found"); only skipped dependents call for a
+        # new plan, and not when the agent has to ask the user to pick between matches anyway.
+        ask_user = any(ASK_USER_SIGNAL in r for r in results.values())
+        if skipped:
+            logger.info(f"Executor: skipped {skipped}, their inputs failed.")
+        return {"messages": new_messages, "plan": [], "plan_invalidated": bool(skipped) and not ask_user}
+
+    def after_planner(state: PlanState) -> Literal["executor", "agent"]:
+        return "executor" if state.get("plan") else "agent"
+
+    def after_executor(state: PlanState) -> Literal["planner", "agent"]:
+        if state.get("plan_invalidated") and state.get("replans", 0) < MAX_REPLANS:
+            return "planner"
+        return "agent"
+
+    workflow = StateGraph(PlanState)
+    workflow.add_node("planner", planner_node)
+    workflow.add_node("executor", executor_node)
     workflow.add_node("agent", agent_node)
-    workflow.add_node("tools", ToolNode(tools))
+    workflow.add_node("tools", tool_node)
 
-    workflow.add_edge(START, "agent")
+    workflow.add_edge(START, "planner")
+    workflow.add_conditional_edges("planner", after_planner, ["executor", "agent"])
+    workflow.add_conditional_edges("executor", after_executor, ["planner", "agent"])
     workflow.add_conditional_edges("agent", should_continue, ["tools", END])
     workflow.add_edge("tools", "agent")
 
@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import os
+import weakref
+import zlib
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+
+import ormsgpack
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+logger = logging.getLogger("CHECKPOINT")
+
+DELTA_TYPE = "delta_messages"
+ZLIB_SUFFIX = "+zlib"
+
+
+class DeltaMessageSerializer(JsonPlusSerializer):
+    """Checkpoint serializer that stores message lists as a content-addressed hash chain.
+
+    Every message payload is stored once under its content hash, and every list is a chain of
+    (parent link, message hash) links. A checkpoint of the `messages` channel therefore only adds
+    the messages appended since its parent, and the blob saved in the checkpointer is just the
+    hash of the last link. Other values, and stored payloads above `compress_threshold` bytes,
+    are zlib-compressed.
+
+    `store` holds the payloads and links and must live as long as the checkpointer does
+    (pass a persistent mapping such as `shelve` when the checkpointer itself is persistent).
+    Entries are shared between threads and never removed: deleting a thread from the
+    checkpointer leaves its messages in `store`.
+
+    Each step re-checkpoints the whole list, so payload hashes are cached per message object
+    (and its ID) and link hashes per (parent, payload): only new messages are serialized and
+    hashed again, instead of the whole conversation on every step.
+    """
+
+    def __init__(self, store: Optional[MutableMapping[str, bytes]] = None,
+                 compress_threshold: int = 1024, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.store: MutableMapping[str, bytes] = store if store is not None else {}
+        self.compress_threshold = compress_threshold
+        # id(message) -> (weak reference, message ID, payload hash); entries go when the message does.
+        self._payload_hashes: Dict[int, Tuple[weakref.ref, Optional[str], str]] = {}
+        self._link_hashes: Dict[Tuple[str, str], str] = {}
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, list) and obj and all(isinstance(m, BaseMessage) for m in obj):
+            head = ""
+            for message in obj:
+                head = self._put_link(head, self._payload_hash(message))
+            return DELTA_TYPE, head.encode("ascii")
+
+        type_, data = super().dumps_typed(obj)
+        if type_ not in ("null", "bytes", "bytearray") and len(data) >= self.compress_threshold:
+            return type_ + ZLIB_SUFFIX, zlib.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_ == DELTA_TYPE:
+            return [self._load_payload(h) for h in self._walk(data_.decode("ascii"))]
+        if type_.endswith(ZLIB_SUFFIX):
+            return super().loads_typed((type_[:-len(ZLIB_SUFFIX)], zlib.decompress(data_)))
+        return super().loads_typed(data)
+
+    def stored_bytes(self) -> int:
+        return sum(len(v) for v in self.store.values())
+
+    def _payload_hash(self, message: BaseMessage) -> str:
+        key = id(message)
+        cached = self._payload_hashes.get(key)
+        if cached and cached[0]() is message and cached[1] == message.id:
+            return cached[2]
+        digest = self._put_payload(message)
+        ref = weakref.ref(message, lambda _, k=key: self._payload_hashes.pop(k, None))
+        self._payload_hashes[key] = (ref, message.id, digest)
+        return digest
+
+    def _put_payload(self, message: BaseMessage) -> str:
+        type_, data = super().dumps_typed(message)
+        digest = "m:" + hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()
+        if digest not in self.store:
+            compressed = len(data) >= self.compress_threshold
+            if compressed:
+                data = zlib.compress(data)
+            self.store[digest] = ormsgpack.packb([type_, compressed, data])
+        return digest
+
+    def _put_link(self, parent: str, payload_hash: str) -> str:
+        digest = self._link_hashes.get((parent, payload_hash))
+        if digest:
+            return digest
+        digest = "c:" + hashlib.sha256(f"{parent}|{payload_hash}".encode()).hexdigest()
+        if digest not in self.store:
+            self.store[digest] = ormsgpack.packb([parent, payload_hash])
+        self._link_hashes[(parent, payload_hash)] = digest
+        return digest
+
+    def _walk(self, head: str) -> List[str]:
+        """Returns the payload hashes of a chain, oldest first."""
+        hashes = []
+        while head:
+            head, payload_hash = ormsgpack.unpackb(self.store[head])
+            hashes.append(payload_hash)
+        hashes.reverse()
+        return hashes
+
+    def _load_payload(self, digest: str) -> BaseMessage:
+        type_, compressed, data = ormsgpack.unpackb(self.store[digest])
+        if compressed:
+            data = zlib.decompress(data)
+        return super().loads_typed((type_, data))
+
+
+def build_checkpointer(mode: Optional[str] = None) -> MemorySaver:
+    """Creates the in-memory checkpointer. Mode "delta" (or CHECKPOINT_SERDE=delta) enables delta storage."""
+    mode = mode or os.getenv("CHECKPOINT_SERDE", "default")
+    if mode == "delta":
+        logger.info("Using delta-encoded checkpoint storage.")
+        return MemorySaver(serde=DeltaMessageSerializer())
+    return MemorySaver()
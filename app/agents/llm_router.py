@@ -0,0 +1,261 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+
+from .resilience import CLOSED, CircuitBreaker
+
+logger = logging.getLogger("LLM_ROUTER")
+
+DEFAULT_MODELS = {
+    "groq": "llama-3.3-70b-versatile",
+    "openai": "gpt-4o-mini",
+    "google": "gemini-2.0-flash",
+}
+
+# Providers and the environment variable holding their (comma-separated) API keys.
+API_KEY_ENV = {
+    "groq": "GQ_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "google": "GCP_API_KEY",
+}
+
+# HTTP statuses worth another backend: this key/model is unusable (auth, unknown model), or the
+# provider is overloaded or broken. Any other 4xx is a bad request that would fail everywhere.
+FAILOVER_STATUS = {401, 403, 404, 408, 409, 429}
+# Exception classes (by name, so provider SDKs stay optional imports) for transport failures:
+# openai/groq APIConnectionError and APITimeoutError, httpx TransportError and its timeouts.
+TRANSPORT_ERRORS = {"APIConnectionError", "TransportError"}
+
+
+def should_fail_over(error: BaseException) -> bool:
+    """True for transport errors, timeouts, rate limits and server errors; False for a bad request.
+
+    Provider wrappers (e.g. the Gemini client) chain the SDK error as `__cause__`, so the chain is searched.
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        status = getattr(current, "status_code", None) or getattr(current, "code", None)
+        if isinstance(status, int) and 100 <= status < 600:
+            return status in FAILOVER_STATUS or status >= 500
+        if isinstance(current, (TimeoutError, ConnectionError)) or \
+                any(cls.__name__ in TRANSPORT_ERRORS for cls in type(current).__mro__):
+            return True
+        current = current.__cause__
+    return False
+
+
+class Backend:
+    """One provider + API key, with the rolling health stats the router ranks it by."""
+
+    def __init__(self, name: str, model: BaseChatModel, window: int = 20,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.model = model
+        self.breaker = CircuitBreaker(name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Records one call. Failed calls count their elapsed time too: a timeout costs the caller that long."""
+        with self._lock:
+            self.outcomes.append(ok)
+            self.latencies.append(latency)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    @property
+    def mean_latency(self) -> float:
+        with self._lock:
+            return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def score(self) -> float:
+        """Expected seconds until a successful answer.
+
+        Untried backends score 0 so they get sampled; backends with only failures in the window rank last.
+        """
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            if not any(self.outcomes):
+                return float("inf")
+        return self.mean_latency / max(0.05, 1.0 - self.error_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "calls": len(self.outcomes),
+            "latency_ms": round(self.mean_latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+        }
+
+
+class RoutingChatModel(BaseChatModel):
+    """Chat model that sends each call to the fastest healthy backend and fails over on errors.
+
+    Backends are ranked by rolling mean latency, inflated by their error rate. Backends whose
+    circuit is open are skipped until their cool-down ends. With probability `explore` a random
+    healthy backend is tried first, so the stats of slower backends don't go stale.
+
+    `bind_tools` binds the tools to every backend, and the bound copy shares the same health
+    stats. Messages use LangChain's provider-neutral format, so a conversation can move between
+    providers between any two calls, including in the middle of a tool-call round.
+    """
+
+    backends: List[Any]
+    explore: float = 0.1
+    # Per-backend runnables (the models with tools bound); empty means the plain models.
+    bound: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "routing"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RoutingChatModel":
+        return self.model_copy(update={"bound": [b.model.bind_tools(tools, **kwargs) for b in self.backends]})
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [b.stats() for b in self.backends]
+
+    def _ranked(self) -> List[int]:
+        """Backend indexes in the order to try them: closed circuits first, then by score."""
+        order = sorted(range(len(self.backends)),
+                       key=lambda i: (self.backends[i].breaker.state != CLOSED, self.backends[i].score))
+        healthy = [i for i in order if self.backends[i].breaker.state == CLOSED]
+        if len(healthy) > 1 and random.random() < self.explore:
+            pick = random.choice(healthy[1:])
+            order.remove(pick)
+            order.insert(0, pick)
+        return order
+
+    def _runnable(self, index: int) -> Runnable:
+        return self.bound[index] if self.bound else self.backends[index].model
+
+    def _available(self) -> Iterator[int]:
+        """Backend indexes to try in order, each one already admitted by its circuit breaker."""
+        for index in self._ranked():
+            if self.backends[index].breaker.allow():
+                yield index
+
+    def _succeeded(self, index: int, message: BaseMessage, start: float) -> ChatResult:
+        backend = self.backends[index]
+        backend.record(True, time.perf_counter() - start)
+        return self._result(message, backend)
+
+    def _failed(self, index: int, error: BaseException, start: float) -> BaseException:
+        """Records a failed call and returns the error to fail over from, or re-raises it.
+
+        Cancellation and bad requests (400, context length, a broken tool schema) say nothing about
+        the backend: they free its half-open trial slot and reach the caller instead of tripping
+        every provider's breaker in turn.
+        """
+        backend = self.backends[index]
+        if not isinstance(error, Exception) or not should_fail_over(error):
+            backend.breaker.release()
+            raise error
+        backend.record(False, time.perf_counter() - start)
+        logger.warning(f"LLM backend '{backend.name}' failed ({type(error).__name__}: {error}), failing over.")
+        return error
+
+    def _route(self, call: Callable[[Runnable], Any]) -> Any:
+        last_error: Optional[BaseException] = None
+        for index in self._available():
+            start = time.perf_counter()
+            try:
+                message = call(self._runnable(index))
+            except BaseException as e:
+                last_error = self._failed(index, e, start)
+                continue
+            return self._succeeded(index, message, start)
+        raise last_error or RuntimeError("No LLM backend available: all circuits are open.")
+
+    async def _aroute(self, call: Callable[[Runnable], Any]) -> Any:
+        last_error: Optional[BaseException] = None
+        for index in self._available():
+            start = time.perf_counter()
+            try:
+                message = await call(self._runnable(index))
+            except BaseException as e:
+                last_error = self._failed(index, e, start)
+                continue
+            return self._succeeded(index, message, start)
+        raise last_error or RuntimeError("No LLM backend available: all circuits are open.")
+
+    @staticmethod
+    def _result(message: BaseMessage, backend: Backend) -> ChatResult:
+        if isinstance(message, AIMessage):
+            message.response_metadata["routed_to"] = backend.name
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return self._route(lambda runnable: runnable.invoke(messages, stop=stop, **kwargs))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return await self._aroute(lambda runnable: runnable.ainvoke(messages, stop=stop, **kwargs))
+
+
+def create_provider_model(provider: str, api_key: str, model: Optional[str] = None,
+                          timeout: float = 30.0) -> BaseChatModel:
+    """A chat model for one provider key. Client retries are off: the router does the failing over."""
+    model = model or DEFAULT_MODELS[provider]
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=model, temperature=0, api_key=api_key, timeout=timeout, max_retries=0)
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, temperature=0, api_key=api_key, timeout=timeout, max_retries=0,
+                          base_url=os.getenv("OPENAI_BASE_URL") or None)
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model, temperature=0, google_api_key=api_key, timeout=timeout,
+                                      max_retries=0)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def build_router_from_env() -> Optional[RoutingChatModel]:
+    """Builds the router from LLM_PROVIDERS (e.g. "groq,openai,google"), or None when it is not set.
+
+    Each provider gets one backend per key in its key variable (comma-separated, see API_KEY_ENV).
+    `<PROVIDER>_MODEL` overrides the model, LLM_TIMEOUT the per-call timeout.
+    """
+    providers = [p.strip().lower() for p in os.getenv("LLM_PROVIDERS", "").split(",") if p.strip()]
+    if not providers:
+        return None
+
+    timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+    backends = []
+    for provider in providers:
+        if provider not in API_KEY_ENV:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        keys = [k.strip() for k in os.getenv(API_KEY_ENV[provider], "").split(",") if k.strip()]
+        if not keys:
+            logger.warning(f"LLM provider '{provider}' has no keys in {API_KEY_ENV[provider]}, skipping it.")
+            continue
+        model = os.getenv(f"{provider.upper()}_MODEL")
+        for n, key in enumerate(keys, start=1):
+            backends.append(Backend(f"{provider}#{n}", create_provider_model(provider, key, model, timeout)))
+
+    if not backends:
+        raise ValueError("LLM_PROVIDERS is set but none of its providers has an API key.")
+    logger.info(f"Routing LLM calls across: {[b.name for b in backends]}")
+    return RoutingChatModel(backends=backends, explore=float(os.getenv("LLM_EXPLORE", "0.1")))
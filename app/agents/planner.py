@@ -0,0 +1,110 @@
+import re
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+from langchain_core.messages import BaseMessage
+from langchain_core.tools import BaseTool
+
+PLAN_EXECUTOR = "plan_executor"
+MAX_REPLANS = 2
+
+# Results that steps depending on them cannot be built on.
+FAILURE_SIGNALS = ("AMBIGUOUS_MATCH", "not found")
+# Failures only the user can resolve, so re-planning is pointless.
+ASK_USER_SIGNAL = "AMBIGUOUS_MATCH"
+
+REFERENCE = re.compile(r"\{(\w+)\.([\w ]+)\}")
+
+PLANNER_INSTRUCTION = """You are the planning step of the JewelryOps Support Agent.
+
+Call `Plan` with ALL the read-only tool calls needed to answer the latest user request.
+- Give each step a short id (s1, s2, ...). A step that needs another step's result lists it in `depends_on`.
+- Use a value from an earlier result as {{step_id.Field}}, e.g. {{"customer_id": "{{s1.ID}}"}}
+  or {{"order_id": "{{s2.Order ID}}"}}. Never guess IDs.
+- Steps without dependencies run in parallel, so include every independent lookup (date, policies, inventory).
+- NEVER plan `action_` tools. They need human approval and are handled after the plan.
+- If a result says AMBIGUOUS_MATCH, or you already have everything you need, do NOT call `Plan`.
+
+Read-only tools:
+{tool_list}
+"""
+
+
+class PlanStep(BaseModel):
+    id: str = Field(description="Short unique step ID, e.g. 's1'.")
+    tool: str = Field(description="Name of the read-only tool to call.")
+    args: Dict[str, Any] = Field(default_factory=dict,
+                                 description="Tool arguments. Values may reference results as {step_id.Field}.")
+    depends_on: List[str] = Field(default_factory=list, description="IDs of steps whose results this step needs.")
+
+
+class Plan(BaseModel):
+    """Submit a dependency graph of read-only tool calls. Independent steps run in parallel."""
+    steps: List[PlanStep]
+
+
+class UnresolvedReference(Exception):
+    pass
+
+
+def is_read_only(tool_name: str) -> bool:
+    return not tool_name.startswith("action_")
+
+
+def describe_tools(tools: List[BaseTool]) -> str:
+    return "\n".join(f"- {t.name}: {t.description}" for t in tools if is_read_only(t.name))
+
+
+def plan_waves(steps: List[PlanStep]) -> List[List[PlanStep]]:
+    """Groups steps into waves: each wave only depends on steps in earlier waves."""
+    by_id = {s.id: s for s in steps}
+    for step in steps:
+        unknown = [d for d in step.depends_on if d not in by_id]
+        if unknown:
+            raise ValueError(f"Step {step.id} depends on unknown steps: {unknown}")
+
+    waves: List[List[PlanStep]] = []
+    done: set = set()
+    remaining = list(steps)
+    while remaining:
+        wave = [s for s in remaining if all(d in done for d in s.depends_on)]
+        if not wave:
+            raise ValueError(f"Plan has a dependency cycle between: {[s.id for s in remaining]}")
+        waves.append(wave)
+        done.update(s.id for s in wave)
+        remaining = [s for s in remaining if s.id not in done]
+    return waves
+
+
+def extract_field(result: str, field: str) -> str:
+    """Pulls `Field: value` out of a tool result like 'ID: CUST_002 | Name: Bob Gold'."""
+    match = re.search(rf"(?:^|[|\n]\s*){re.escape(field)}:\s*([^|\n]+)", result)
+    if not match:
+        raise UnresolvedReference(f"'{field}' not found in result")
+    return match.group(1).strip()
+
+
+def resolve_args(args: Dict[str, Any], results: Dict[str, str]) -> Dict[str, Any]:
+    """Replaces {step_id.Field} references in string arguments with values from earlier results."""
+
+    def substitute(match: re.Match) -> str:
+        step_id, field = match.group(1), match.group(2)
+        if step_id not in results:
+            raise UnresolvedReference(f"No result for step {step_id}")
+        return extract_field(results[step_id], field)
+
+    return {k: REFERENCE.sub(substitute, v) if isinstance(v, str) else v for k, v in args.items()}
+
+
+def is_failed_result(result: str) -> bool:
+    lowered = result.lower()
+    return any(signal.lower() in lowered for signal in FAILURE_SIGNALS)
+
+
+def message_text(message: BaseMessage) -> str:
+    """Text of a tool result, whether it is a plain string or a list of content blocks (MCP tools)."""
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(p["text"] if isinstance(p, dict) else str(p) for p in content
+                         if isinstance(p, str) or (isinstance(p, dict) and "text" in p))
+    return str(content)
@@ -0,0 +1,288 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, ToolException
+
+logger = logging.getLogger("RESILIENCE")
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """Stops calling a server after repeated failures, then lets one trial call through after a cool-down.
+
+    A trial that never reports back (e.g. it was cancelled) does not block the breaker: callers
+    `release()` the slot, and a half-open breaker grants a new trial after another `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 on_open: Optional[Callable[[str], None]] = None) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_open = on_open
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state != CLOSED and time.monotonic() - self.opened_at >= self.reset_timeout:
+                logger.info(f"Circuit for '{self.name}' is half-open, allowing a trial call.")
+                self.state = HALF_OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def release(self) -> None:
+        """Gives back a trial slot whose call ended without a result, so the next caller can try."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for '{self.name}' closed again.")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            should_open = self.state == HALF_OPEN or self.failures >= self.failure_threshold
+            if not should_open or self.state == OPEN:
+                return
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        logger.error(f"Circuit for '{self.name}' opened after {self.failures} failures.")
+        if self.on_open:
+            self.on_open(self.name)
+
+
+class ResilientTool(BaseTool):
+    """Wraps a remote MCP tool with a deadline, a per-server circuit breaker and hedged retries.
+
+    Read-only tools get a second, hedged attempt when the first one fails or has not answered
+    after `hedge_delay`; whichever finishes first wins. `action_` tools are never retried,
+    since they are not idempotent. Instead of hanging or raising, an unreachable server turns
+    into an explicit SERVICE_UNAVAILABLE result for the LLM.
+    """
+
+    inner: Any
+    server: str
+    timeout: float
+    hedge_delay: Optional[float] = None
+    breaker: Any
+
+    def __init__(self, inner: BaseTool, server: str, breaker: CircuitBreaker,
+                 timeout: float = 20.0, hedge_delay: Optional[float] = 8.0) -> None:
+        read_only = not inner.name.startswith("action_")
+        super().__init__(
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema,
+            response_format=inner.response_format,
+            metadata=inner.metadata,
+            # Keep the inner tool's error handling, so a tool error still reaches the LLM as a ToolMessage
+            handle_tool_error=inner.handle_tool_error,
+            handle_validation_error=inner.handle_validation_error,
+            inner=inner,
+            server=server,
+            timeout=timeout,
+            hedge_delay=hedge_delay if read_only else None,
+            breaker=breaker,
+        )
+
+    def _run(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        # MCP tools are async-only; sync callers get the same call on a private event loop.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self._arun(config=config, **kwargs)).result()
+
+    async def _arun(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        if not self.breaker.allow():
+            return self._unavailable("is marked as down after repeated failures")
+
+        try:
+            result = await self._call_hedged(config, kwargs)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except ToolException:
+            # The server answered with an application error, so it is healthy. `handle_tool_error` reports it.
+            self.breaker.record_success()
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {self.name} on '{self.server}' timed out after {self.timeout}s.")
+            self.breaker.record_failure()
+            return self._unavailable(f"did not respond within {self.timeout:.0f}s")
+        except Exception as e:
+            logger.error(f"Tool {self.name} on '{self.server}' failed: {e}")
+            self.breaker.record_failure()
+            return self._unavailable("failed to respond")
+
+        self.breaker.record_success()
+        return result
+
+    async def _call_hedged(self, config: RunnableConfig, kwargs: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        max_attempts = 1 if self.hedge_delay is None else 2
+
+        pending: Set[asyncio.Task] = set()
+        attempts = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal attempts
+            attempts += 1
+            pending.add(asyncio.ensure_future(self.inner._arun(config=config, **kwargs)))
+
+        launch()
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                wait_for = remaining
+                if attempts < max_attempts:
+                    wait_for = min(remaining, self.hedge_delay)
+
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    if isinstance(last_error, ToolException):
+                        raise last_error
+
+                if attempts < max_attempts:
+                    reason = "failed" if done else "is slow"
+                    logger.warning(f"Tool {self.name} {reason}, sending a hedged attempt.")
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or asyncio.TimeoutError()
+
+    def _unavailable(self, reason: str) -> Any:
+        message = f"ERROR: SERVICE_UNAVAILABLE. The {self.server.upper()} service {reason}. "
+        if self.name.startswith("action_"):
+            message += ("The outcome of this action is UNKNOWN. Do NOT retry it; tell the user "
+                        "it must be verified once the service is back.")
+        else:
+            message += "Do NOT retry now; tell the user this system is temporarily unavailable."
+        if self.response_format == "content_and_artifact":
+            return message, None
+        return message
+
+
+class ServerSupervisor:
+    """Keeps long-running MCP server processes alive, restarting any that exit or are reported stuck.
+
+    A server that exits within `min_uptime` seconds `max_quick_exits` times in a row (e.g. its
+    port is still held by an orphaned server) is given up on instead of being respawned forever.
+    """
+
+    def __init__(self, commands: Dict[str, List[str]], check_interval: float = 1.0,
+                 restart_backoff: float = 1.0, min_uptime: float = 5.0, max_quick_exits: int = 3) -> None:
+        self.commands = commands
+        self.check_interval = check_interval
+        self.restart_backoff = restart_backoff
+        self.min_uptime = min_uptime
+        self.max_quick_exits = max_quick_exits
+        self.processes: Dict[str, subprocess.Popen] = {}
+        self.restarts: Dict[str, int] = {name: 0 for name in commands}
+        self.quick_exits: Dict[str, int] = {name: 0 for name in commands}
+        self.given_up: Set[str] = set()
+        self._started_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        for name in self.commands:
+            self._spawn(name)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._monitor, name="mcp-supervisor", daemon=True)
+        self._thread.start()
+
+    def restart(self, name: str) -> None:
+        """Kills and relaunches a server, e.g. when its circuit breaker opens."""
+        logger.warning(f"Restarting MCP server '{name}'.")
+        with self._lock:
+            process = self.processes.get(name)
+            if process and process.poll() is None:
+                # SIGTERM first, so the server can clean up (e.g. its temporary database); kill if it is stuck.
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+            self.restarts[name] += 1
+            self._spawn(name)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            for process in self.processes.values():
+                if process.poll() is None:
+                    process.terminate()
+            for process in self.processes.values():
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    def _spawn(self, name: str) -> None:
+        self.processes[name] = subprocess.Popen(self.commands[name])
+        self._started_at[name] = time.monotonic()
+        logger.info(f"Started MCP server '{name}' (pid {self.processes[name].pid}).")
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            for name, process in list(self.processes.items()):
+                if process.poll() is None or self._stop.is_set() or name in self.given_up:
+                    continue
+                uptime = time.monotonic() - self._started_at[name]
+                self.quick_exits[name] = self.quick_exits[name] + 1 if uptime < self.min_uptime else 0
+                if self.quick_exits[name] >= self.max_quick_exits:
+                    logger.error(f"MCP server '{name}' exited right after starting {self.quick_exits[name]} times "
+                                 f"(is its port taken by another process?), no longer restarting it.")
+                    self.given_up.add(name)
+                    continue
+                logger.error(f"MCP server '{name}' exited with code {process.returncode}, restarting.")
+                time.sleep(self.restart_backoff)
+                with self._lock:
+                    if self.processes[name] is process:
+                        self.restarts[name] += 1
+                        self._spawn(name)
+
+
+def http_server_commands(servers: Dict[str, tuple], server_dir: str) -> Dict[str, List[str]]:
+    """Command lines that run each (script, port) server as a streamable HTTP server."""
+    host = os.getenv("MCP_HOST", "127.0.0.1")
+    return {
+        name: [sys.executable, os.path.join(server_dir, script), "--transport", "streamable-http",
+               "--host", host, "--port", str(port)]
+        for name, (script, port) in servers.items()
+    }
@@ -0,0 +1,92 @@
+import json
+import logging
+import re
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from .planner import message_text
+
+logger = logging.getLogger("TOOL_SELECTION")
+
+# Tools served by the Comms server, for tool lists that don't carry a `server` (local/in-process tools).
+COMMS_TOOLS = frozenset({"action_send_email_to_customer", "action_add_internal_note", "get_message_status"})
+
+CUSTOMER_ID = re.compile(r"\bCUST_\d+\b")
+# A single-customer CRM result starts with the profile; AMBIGUOUS_MATCH errors list IDs further in.
+RESOLVED_PROFILE = re.compile(r"^ID: CUST_\d+ \|")
+
+
+def is_comms_tool(t: BaseTool) -> bool:
+    return getattr(t, "server", None) == "comms" or t.name in COMMS_TOOLS
+
+
+def customer_resolved(messages: Sequence[BaseMessage]) -> bool:
+    """True once a CRM lookup found exactly one customer, or the user gave a customer ID."""
+    for m in messages:
+        if isinstance(m, ToolMessage) and m.name == "get_customer_profile" \
+                and RESOLVED_PROFILE.match(message_text(m)):
+            return True
+        if isinstance(m, HumanMessage) and CUSTOMER_ID.search(str(m.content)):
+            return True
+    return False
+
+
+def policy_checked(messages: Sequence[BaseMessage]) -> bool:
+    return any(isinstance(m, ToolMessage) and m.name == "policy_lookup" for m in messages)
+
+
+def schema_tokens(t: BaseTool) -> int:
+    """Rough token count of a tool's JSON schema in a request (~4 characters per token)."""
+    return len(json.dumps(convert_to_openai_tool(t))) // 4
+
+
+class ToolSelector:
+    """Binds only the tools that make sense at the current step of the conversation.
+
+    - Comms tools are hidden until a customer is resolved (nobody to email or annotate yet).
+    - Other `action_` tools (refunds) are hidden until a policy was looked up. Comms actions only need
+      the customer: emailing an order status must not wait for an unrelated policy lookup.
+
+    The ToolNode keeps the full toolset, so this only trims what the LLM is offered. Bound models
+    are cached per tool subset, and every call logs the schema tokens it saved.
+    """
+
+    def __init__(self, llm: BaseChatModel, tools: List[BaseTool]) -> None:
+        self.llm = llm
+        self.tools = tools
+        self._bound: Dict[FrozenSet[str], Runnable] = {}
+        self._tokens = {t.name: schema_tokens(t) for t in tools}
+        self.full_tokens = sum(self._tokens.values())
+        self.calls = 0
+        self.tokens_saved = 0
+
+    def select(self, messages: Sequence[BaseMessage]) -> List[BaseTool]:
+        allow_comms = customer_resolved(messages)
+        allow_actions = policy_checked(messages)
+        selected = []
+        for t in self.tools:
+            if is_comms_tool(t):
+                if allow_comms:
+                    selected.append(t)
+            elif allow_actions or not t.name.startswith("action_"):
+                selected.append(t)
+        return selected
+
+    def bind(self, messages: Sequence[BaseMessage]) -> Tuple[Runnable, int]:
+        """Returns the LLM bound to the tools for this step, and the schema tokens saved by pruning."""
+        selected = self.select(messages)
+        key = frozenset(t.name for t in selected)
+        if key not in self._bound:
+            self._bound[key] = self.llm.bind_tools(selected)
+
+        saved = self.full_tokens - sum(self._tokens[name] for name in key)
+        self.calls += 1
+        self.tokens_saved += saved
+        logger.info(f"Bound {len(selected)}/{len(self.tools)} tools, ~{saved} schema tokens saved "
+                    f"({self.tokens_saved} over {self.calls} calls).")
+        return self._bound[key], saved
@@ -5,11 +5,10 @@ import uuid
 import asyncio
 import streamlit as st
 
-from langgraph.checkpoint.memory import MemorySaver
-
 from agents.agent import load_mcp_tools, build_graph
+from agents.checkpoint import build_checkpointer
 
-from typing import Coroutine, Any, TypeVar, Tuple
+from typing import Coroutine, Any, List, TypeVar, Tuple
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -26,6 +25,8 @@ logger = logging.getLogger("APP")
 
 T = TypeVar("T")
 
+HISTORY_PAGE_SIZE = 20
+
 
 # ------ Leave helpers here for simplicity ------
 def parse_response(content: Any) -> str:
@@ -61,25 +62,74 @@ def run_async(coroutine: Coroutine[Any, Any, T]) -> T:
 def get_graph_and_client() -> Tuple[Any, Any]:
     async def _init() -> Tuple[Any, Any]:
         tools, client = await load_mcp_tools()
-        graph = build_graph(tools, checkpointer=st.session_state.memory)
+        graph = build_graph(tools, checkpointer=st.session_state.memory, mode=os.getenv("AGENT_MODE", "loop"))
         return graph, client
 
     return run_async(_init())
 
 
+def add_message(role: str, content: Any) -> None:
+    st.session_state.messages.append({"id": str(uuid.uuid4()), "role": role, "content": content})
+
+
+def get_clean_content(msg: dict) -> str:
+    """parse_response memoized per message ID, so reruns don't re-parse the whole history."""
+    cache = st.session_state.render_cache
+    if msg["id"] not in cache:
+        cache[msg["id"]] = parse_response(msg["content"])
+    return cache[msg["id"]]
+
+
+def get_sensitive_tools(message: Any) -> List[dict]:
+    tool_calls = getattr(message, "tool_calls", None) or []
+    return [t for t in tool_calls if t["name"].startswith("action_")]
+
+
+def load_older_messages() -> None:
+    st.session_state.history_limit += HISTORY_PAGE_SIZE
+
+
+@st.fragment
+def render_history() -> None:
+    """Renders only the newest window of messages; older pages load on demand.
+
+    Runs as a fragment, so "load older" reruns just the history instead of the whole app.
+    """
+    messages = st.session_state.messages
+    hidden = max(0, len(messages) - st.session_state.history_limit)
+
+    if hidden:
+        st.button(f"⬆️ Load older messages ({hidden} hidden)", on_click=load_older_messages)
+
+    for msg in messages[hidden:]:
+        with st.chat_message(msg["role"]):
+            st.markdown(get_clean_content(msg))
+
+
 def reset_memory() -> None:
     st.session_state.thread_id = str(uuid.uuid4())
     st.session_state.messages = []
+    st.session_state.render_cache = {}
+    st.session_state.history_limit = HISTORY_PAGE_SIZE
+    st.session_state.pending_approval = []
     logger.info(f"Memory cleared. New ID: {st.session_state.thread_id}")
 # ------ End of helpers ------
 
 
 if "memory" not in st.session_state:
-    st.session_state.memory = MemorySaver()
+    st.session_state.memory = build_checkpointer()
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
+if "render_cache" not in st.session_state:
+    st.session_state.render_cache = {}
+if "history_limit" not in st.session_state:
+    st.session_state.history_limit = HISTORY_PAGE_SIZE
+# Sensitive tool calls waiting for approval. Kept in sync with the graph interrupt, so reruns don't
+# need to fetch the whole state snapshot just to find out whether to show the approval buttons.
+if "pending_approval" not in st.session_state:
+    st.session_state.pending_approval = []
 
 graph, mcp_client = get_graph_and_client()
 
@@ -91,13 +141,12 @@ with st.sidebar:
     if st.button("🧹 Clear Memory", on_click=reset_memory):
         st.success("Memory Wiped!")
 
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        clean_content = parse_response(msg["content"])
-        st.markdown(clean_content)
+render_history()
 
 if prompt := st.chat_input("How can I help you today?"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    # Set again below only if this run stops at an action_ interrupt
+    st.session_state.pending_approval = []
+    add_message("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
@@ -150,6 +199,7 @@ if prompt := st.chat_input("How can I help you today?"):
                                 sensitive_tools = [t for t in last_msg.tool_calls if t["name"].startswith("action_")]
 
                                 if sensitive_tools:
+                                    st.session_state.pending_approval = sensitive_tools
                                     return "__REQUIRE_APPROVAL__"
                                 else:
                                     current_input = None
@@ -170,7 +220,7 @@ if prompt := st.chat_input("How can I help you today?"):
             else:
                 clean_text = parse_response(full_response)
                 message_placeholder.markdown(clean_text)
-                st.session_state.messages.append({"role": "assistant", "content": clean_text})
+                add_message("assistant", clean_text)
 
         except Exception as e:
             logger.error(f"Execution Error: {e}", exc_info=True)
@@ -178,45 +228,42 @@ if prompt := st.chat_input("How can I help you today?"):
 
 try:
     config = {"configurable": {"thread_id": st.session_state.thread_id}}
+    sensitive_tools = st.session_state.pending_approval
+
+    if sensitive_tools:
+        st.warning("⚠️ **APPROVAL REQUIRED**")
+
+        for tool in sensitive_tools:
+            with st.expander(f"Checking Action: {tool['name']}", expanded=True):
+                st.json(tool['args'])
+
+        col1, col2 = st.columns(2)
+
+        if col1.button("✅ Approve Action"):
+            with st.spinner("Executing Action..."):
+                async def resume_sensitive():
+                    last_msg = None
+                    while True:
+                        async for event in graph.astream(None, config, stream_mode="values"):
+                            if "messages" in event:
+                                last_msg = event["messages"][-1]
+                        # Keep going through read-only tool steps, stop at the next sensitive one
+                        if getattr(last_msg, "tool_calls", None) and not get_sensitive_tools(last_msg):
+                            continue
+                        return last_msg
+
+                last_msg = run_async(resume_sensitive())
+                # The agent may stop at another sensitive action right away
+                st.session_state.pending_approval = get_sensitive_tools(last_msg)
+                clean_result = parse_response(last_msg.content if last_msg else "")
+
+                add_message("assistant", clean_result)
+                st.rerun()
 
-    try:
-        snapshot = graph.get_state(config)
-    except Exception:
-        snapshot = None
-
-    if snapshot and snapshot.next and "tools" in snapshot.next:
-        last_message = snapshot.values["messages"][-1]
-
-        if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-            sensitive_tools = [t for t in last_message.tool_calls if t["name"].startswith("action_")]
-
-            if sensitive_tools:
-                st.warning("⚠️ **APPROVAL REQUIRED**")
-
-                for tool in sensitive_tools:
-                    with st.expander(f"Checking Action: {tool['name']}", expanded=True):
-                        st.json(tool['args'])
-
-                col1, col2 = st.columns(2)
-
-                if col1.button("✅ Approve Action"):
-                    with st.spinner("Executing Action..."):
-                        async def resume_sensitive():
-                            last_msg = ""
-                            async for event in graph.astream(None, config, stream_mode="values"):
-                                if "messages" in event:
-                                    last_msg = event["messages"][-1]
-                            return last_msg.content if last_msg else ""
-
-                        raw_result = run_async(resume_sensitive())
-                        clean_result = parse_response(raw_result)
-
-                        st.session_state.messages.append({"role": "assistant", "content": clean_result})
-                        st.rerun()
-
-                if col2.button("❌ Deny"):
-                    st.error("Action Denied.")
-                    st.stop()
+        if col2.button("❌ Deny"):
+            st.session_state.pending_approval = []
+            st.error("Action Denied.")
+            st.stop()
 
 except Exception as e:
     logger.error(f"State Check Failed: {e}", exc_info=True)
@@ -0,0 +1,71 @@
+"""Measures checkpoint bytes stored per conversation turn, default vs delta serialization.
+
+Runs the README scenarios back to back in one thread with the scripted fake LLM, then checks
+that every checkpoint in the history restores to the same state under both modes.
+
+    uv run app/benchmarks/checkpoint_bytes.py --turns 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.agents.agent import build_graph
+from app.agents.checkpoint import build_checkpointer
+from app.benchmarks.fake_chat import ScriptedChatModel
+from app.benchmarks.harness import run_ticket
+from app.benchmarks.load_test import checkpointer_bytes
+from app.benchmarks.local_tools import in_process_tools
+from app.benchmarks.scenarios import SCENARIOS
+
+THREAD_ID = "checkpoint-bench"
+
+
+def run_conversation(mode: str, turns: int) -> Dict[str, Any]:
+    """Runs `turns` user turns and records the checkpointer size after each one."""
+    checkpointer = build_checkpointer(mode)
+    graph = build_graph(in_process_tools(), checkpointer, llm=ScriptedChatModel(latency=0), step_delay=0)
+    config = {"configurable": {"thread_id": THREAD_ID}}
+
+    sizes = []
+    for turn in range(turns):
+        asyncio.run(run_ticket(graph, SCENARIOS[turn % len(SCENARIOS)].prompt, config))
+        sizes.append(checkpointer_bytes(checkpointer))
+
+    history = [snapshot.values for snapshot in graph.get_state_history(config)]
+    return {"sizes": sizes, "history": history}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Checkpoint bytes per turn, default vs delta.")
+    parser.add_argument("--turns", type=int, default=12)
+    args = parser.parse_args()
+
+    default = run_conversation("default", args.turns)
+    delta = run_conversation("delta", args.turns)
+
+    identical = _strip_ids(default["history"]) == _strip_ids(delta["history"])
+    print(f"Restored history identical across modes: {identical} ({len(delta['history'])} checkpoints)")
+
+    print("\nturn   default(KB)  +turn(KB)    delta(KB)  +turn(KB)  ratio")
+    prev_default = prev_delta = 0
+    for turn, (d, x) in enumerate(zip(default["sizes"], delta["sizes"]), start=1):
+        print(f"{turn:4d} {d / 1024:13.1f} {(d - prev_default) / 1024:10.1f} "
+              f"{x / 1024:12.1f} {(x - prev_delta) / 1024:10.1f} {d / x:6.1f}x")
+        prev_default, prev_delta = d, x
+
+
+def _strip_ids(history: List[Dict[str, Any]]) -> List[Any]:
+    """Message and tool-call IDs are random per run, so compare the conversation content only."""
+    return [
+        [(type(m).__name__, m.content, [(c["name"], c["args"]) for c in getattr(m, "tool_calls", [])])
+         for m in values.get("messages", [])]
+        for values in history
+    ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import asyncio
+import random
+import threading
+import time
+import uuid
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+from app.agents.planner import PLAN_EXECUTOR, Plan
+from app.benchmarks.scenarios import Scenario, find_scenario
+
+_calls_lock = threading.Lock()
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Offline stand-in for the LLM that replays the scripted tool calls of a scenario.
+
+    Each call sleeps `latency` (+/- `jitter`) seconds to imitate a hosted model. The number of
+    tool-call rounds since the last user message decides which step of the script comes next.
+    When bound to the `Plan` tool it acts as the plan-and-execute planner instead.
+    Emitted messages carry `response_metadata["emitted_at"]` (a perf_counter timestamp).
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.0
+    bound_tools: List[str] = Field(default_factory=list)
+    # Shared by every copy made by bind_tools, so `calls` counts the whole graph.
+    call_log: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def calls(self) -> int:
+        return len(self.call_log)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        names = [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+        return self.model_copy(update={"bound_tools": names})
+
+    @property
+    def is_planner(self) -> bool:
+        return Plan.__name__ in self.bound_tools
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _count_call(self) -> None:
+        with _calls_lock:
+            self.call_log.append("planner" if self.is_planner else "agent")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._count_call()
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self.next_message(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._count_call()
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self.next_message(messages))])
+
+    def next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        scenario = find_scenario(messages[last_human].content) if last_human >= 0 else None
+        if scenario is None:
+            return self._stamp(AIMessage(content="How can I help you with your jewelry order?"))
+
+        turn = messages[last_human + 1:]
+        if self.is_planner:
+            return self._stamp(self._plan(scenario, turn))
+
+        executed_plan = any(isinstance(m, AIMessage) and m.name == PLAN_EXECUTOR for m in turn)
+        script = scenario.after_plan if executed_plan else scenario.steps
+        rounds = sum(1 for m in turn if isinstance(m, AIMessage) and m.tool_calls and m.name != PLAN_EXECUTOR)
+        if rounds >= len(script):
+            return self._stamp(AIMessage(content=scenario.final))
+
+        tool_calls = [
+            {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}
+            for name, args in script[rounds]
+        ]
+        return self._stamp(AIMessage(content="", tool_calls=tool_calls))
+
+    @staticmethod
+    def _plan(scenario: Scenario, turn: List[BaseMessage]) -> AIMessage:
+        """Plans once per turn, and never again once a result came back ambiguous."""
+        if any(isinstance(m, AIMessage) and m.name == PLAN_EXECUTOR for m in turn):
+            return AIMessage(content="")
+        tool_call = {"name": Plan.__name__, "args": {"steps": scenario.plan}, "id": f"call_{uuid.uuid4().hex[:12]}"}
+        return AIMessage(content="", tool_calls=[tool_call])
+
+    @staticmethod
+    def _stamp(message: AIMessage) -> AIMessage:
+        message.response_metadata["emitted_at"] = time.perf_counter()
+        return message
@@ -0,0 +1,49 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+
+
+class ProxyTool(BaseTool):
+    """Base for benchmark wrappers: same name, description, schema and output format as `inner`."""
+
+    inner: BaseTool
+
+    def __init__(self, inner: BaseTool, **fields: Any) -> None:
+        super().__init__(
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema,
+            response_format=inner.response_format,
+            inner=inner,
+            **fields,
+        )
+
+    def _run(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        return self.inner._run(*args, config=config, **kwargs)
+
+    async def _arun(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        return await self.inner._arun(*args, config=config, **kwargs)
+
+
+async def run_ticket(
+        graph: Any,
+        prompt: str,
+        config: Dict[str, Any],
+        on_interrupt: Optional[Callable[[AIMessage], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """Runs one user turn to its final answer and returns the final state.
+
+    Every tools interrupt is approved automatically by resuming the graph; `on_interrupt` is
+    awaited with the pending tool-call message first (e.g. to imitate a human approving it).
+    """
+    current_input: Any = {"messages": [("user", prompt)]}
+    while True:
+        state = await graph.ainvoke(current_input, config)
+        last_msg = state["messages"][-1]
+        if not getattr(last_msg, "tool_calls", None):
+            return state
+        if on_interrupt:
+            await on_interrupt(last_msg)
+        current_input = None
@@ -0,0 +1,278 @@
+"""Concurrent-session load generator for the whole agent stack.
+
+Simulates support conversations against `build_graph` with a latency-configurable fake LLM
+and the real MCP servers, then reports throughput, turn latency percentiles, tool-queue wait,
+checkpointer size and process RSS over time.
+
+    uv run app/benchmarks/load_test.py --users 20 --arrival-rate 4 --turns 2 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from app.agents.agent import build_graph, load_mcp_tools
+from app.agents.checkpoint import build_checkpointer
+from app.benchmarks.fake_chat import ScriptedChatModel
+from app.benchmarks.harness import ProxyTool, run_ticket
+from app.benchmarks.scenarios import SCENARIOS, Scenario
+
+logger = logging.getLogger("LOAD_TEST")
+
+
+@dataclass
+class Session:
+    """Per-user bookkeeping, shared with the tool wrappers through a context variable."""
+    user: int
+    thread_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    tool_ready_at: Optional[float] = None
+
+
+@dataclass
+class Metrics:
+    turn_latencies: List[float] = field(default_factory=list)
+    tool_waits: List[float] = field(default_factory=list)
+    tool_durations: List[float] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    samples: List[Dict[str, float]] = field(default_factory=list)
+    active_sessions: int = 0
+
+
+CURRENT_SESSION: contextvars.ContextVar[Optional[Session]] = contextvars.ContextVar("session", default=None)
+
+
+class TimedTool(ProxyTool):
+    """Wraps a tool to record how long its call waited after the model asked for it, and how long it ran."""
+
+    metrics: Any
+
+    def _mark_start(self) -> float:
+        start = time.perf_counter()
+        session = CURRENT_SESSION.get()
+        if session and session.tool_ready_at is not None:
+            self.metrics.tool_waits.append(start - session.tool_ready_at)
+        return start
+
+    def _run(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        start = self._mark_start()
+        try:
+            return super()._run(*args, config=config, **kwargs)
+        finally:
+            self.metrics.tool_durations.append(time.perf_counter() - start)
+
+    async def _arun(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        start = self._mark_start()
+        try:
+            return await super()._arun(*args, config=config, **kwargs)
+        finally:
+            self.metrics.tool_durations.append(time.perf_counter() - start)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process; falls back to the peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def checkpointer_bytes(checkpointer: Any) -> int:
+    """Total serialized bytes held by an in-memory checkpointer (checkpoints, channel blobs and writes).
+
+    Includes the payload store of a `DeltaMessageSerializer`, if the checkpointer uses one.
+    """
+
+    def size(obj: Any) -> int:
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return len(obj)
+        if isinstance(obj, dict):
+            return sum(size(v) for v in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return sum(size(v) for v in obj)
+        return 0
+
+    total = 0
+    for attr in ("storage", "blobs", "writes"):
+        total += size(getattr(checkpointer, attr, {}))
+    return total + size(getattr(getattr(checkpointer, "serde", None), "store", {}))
+
+
+async def run_turn(graph: Any, prompt: str, session: Session, approval_delay: float) -> None:
+    """Drives one user turn like app.py does, approving sensitive actions after `approval_delay`."""
+
+    async def approve(last_msg: Any) -> None:
+        ready_at = last_msg.response_metadata.get("emitted_at", time.perf_counter())
+        if any(t["name"].startswith("action_") for t in last_msg.tool_calls):
+            await asyncio.sleep(approval_delay)
+            ready_at += approval_delay
+        session.tool_ready_at = ready_at
+
+    await run_ticket(graph, prompt, {"configurable": {"thread_id": session.thread_id}}, on_interrupt=approve)
+
+
+async def run_user(graph: Any, user: int, scenarios: List[Scenario], turns: int,
+                   approval_delay: float, metrics: Metrics) -> None:
+    session = Session(user=user)
+    CURRENT_SESSION.set(session)
+    metrics.active_sessions += 1
+    try:
+        for turn in range(turns):
+            scenario = scenarios[(user + turn) % len(scenarios)]
+            start = time.perf_counter()
+            try:
+                await run_turn(graph, scenario.prompt, session, approval_delay)
+                metrics.turn_latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                logger.error(f"User {user} failed on '{scenario.name}': {e}")
+                metrics.errors.append(f"{scenario.name}: {e}")
+    finally:
+        metrics.active_sessions -= 1
+
+
+def take_sample(checkpointer: Any, metrics: Metrics, started: float) -> None:
+    metrics.samples.append({
+        "t": time.perf_counter() - started,
+        "active": metrics.active_sessions,
+        "rss_mb": current_rss_mb(),
+        "checkpoint_kb": checkpointer_bytes(checkpointer) / 1024,
+        "turns": len(metrics.turn_latencies),
+    })
+
+
+async def sample_resources(checkpointer: Any, metrics: Metrics, interval: float, started: float) -> None:
+    while True:
+        take_sample(checkpointer, metrics, started)
+        await asyncio.sleep(interval)
+
+
+async def run_load(
+        users: int = 10,
+        arrival_rate: float = 2.0,
+        turns: int = 1,
+        llm_latency: float = 0.5,
+        llm_jitter: float = 0.1,
+        approval_delay: float = 0.0,
+        sample_interval: float = 1.0,
+        tools: Optional[List[BaseTool]] = None,
+        checkpoint_mode: str = "default",
+        seed: int = 7,
+) -> Dict[str, Any]:
+    """Runs the load and returns a report dict. `tools` defaults to the real MCP toolset."""
+    rng = random.Random(seed)
+    metrics = Metrics()
+    if tools is None:
+        tools, _ = await load_mcp_tools()
+
+    llm = ScriptedChatModel(latency=llm_latency, jitter=llm_jitter)
+    checkpointer = build_checkpointer(checkpoint_mode)
+    graph = build_graph([TimedTool(t, metrics=metrics) for t in tools], checkpointer, llm=llm, step_delay=0)
+
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_resources(checkpointer, metrics, sample_interval, started))
+
+    user_tasks = []
+    for user in range(users):
+        user_tasks.append(asyncio.create_task(run_user(graph, user, SCENARIOS, turns, approval_delay, metrics)))
+        # Poisson arrivals: exponential gaps between users.
+        if arrival_rate > 0 and user < users - 1:
+            await asyncio.sleep(rng.expovariate(arrival_rate))
+
+    await asyncio.gather(*user_tasks)
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    take_sample(checkpointer, metrics, started)
+
+    lat, waits = metrics.turn_latencies, metrics.tool_waits
+    return {
+        "users": users,
+        "turns": len(lat),
+        "errors": len(metrics.errors),
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": len(lat) / elapsed if elapsed else 0.0,
+        "llm_calls": llm.calls,
+        "tool_calls": len(metrics.tool_durations),
+        "turn_latency_s": {p: percentile(lat, p) for p in (50, 95, 99)},
+        "tool_queue_wait_s": {p: percentile(waits, p) for p in (50, 95, 99)},
+        "tool_duration_s": {p: percentile(metrics.tool_durations, p) for p in (50, 95, 99)},
+        "checkpoint_bytes": checkpointer_bytes(checkpointer),
+        "peak_rss_mb": max(s["rss_mb"] for s in metrics.samples),
+        "samples": metrics.samples,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def pcts(values: Dict[int, float]) -> str:
+        return " | ".join(f"p{p}: {v * 1000:.0f} ms" for p, v in values.items())
+
+    print(f"\n=== Load test: {report['users']} users ===")
+    print(f"Completed turns:   {report['turns']} ({report['errors']} errors) in {report['elapsed_s']:.1f}s")
+    print(f"Throughput:        {report['throughput_turns_per_s']:.2f} turns/s")
+    print(f"LLM / tool calls:  {report['llm_calls']} / {report['tool_calls']}")
+    print(f"Turn latency:      {pcts(report['turn_latency_s'])}")
+    print(f"Tool-queue wait:   {pcts(report['tool_queue_wait_s'])}")
+    print(f"Tool duration:     {pcts(report['tool_duration_s'])}")
+    print(f"Checkpointer size: {report['checkpoint_bytes'] / 1024:.1f} KB")
+    print(f"Peak RSS:          {report['peak_rss_mb']:.1f} MB")
+
+    print("\n   t(s)  active  turns  rss(MB)  checkpoint(KB)")
+    for s in report["samples"]:
+        print(f"{s['t']:7.1f} {s['active']:7d} {s['turns']:6d} {s['rss_mb']:8.1f} {s['checkpoint_kb']:15.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent-session load generator for the JewelryOps agent.")
+    parser.add_argument("--users", type=int, default=10, help="Number of simulated users.")
+    parser.add_argument("--arrival-rate", type=float, default=2.0, help="Mean new users per second (0 = all at once).")
+    parser.add_argument("--turns", type=int, default=1, help="Conversations per user, run in the same thread.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM latency per call, seconds.")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Uniform +/- jitter on the LLM latency.")
+    parser.add_argument("--approval-delay", type=float, default=0.0, help="Simulated operator approval time.")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between resource samples.")
+    parser.add_argument("--checkpoint-serde", choices=["default", "delta"], default="default")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - [%(name)s] - %(levelname)s - %(message)s")
+    report = asyncio.run(run_load(
+        users=args.users,
+        arrival_rate=args.arrival_rate,
+        turns=args.turns,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        approval_delay=args.approval_delay,
+        sample_interval=args.sample_interval,
+        checkpoint_mode=args.checkpoint_serde,
+        seed=args.seed,
+    ))
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from typing import List
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from app.agents.agent import policy_lookup, get_current_date, summarize_case
+from app.mcp_servers import server_comms, server_crm, server_oms
+
+
+def in_process_tools() -> List[BaseTool]:
+    """The full agent toolset, calling the MCP server functions directly instead of over MCP.
+
+    Same names, arguments and outputs as `load_mcp_tools`, without subprocess or transport cost.
+    """
+    functions = [
+        server_crm.get_customer_profile,
+        server_oms.get_customer_orders,
+        server_oms.get_order_details,
+        server_oms.check_inventory,
+        server_oms.action_process_refund,
+        server_comms.action_send_email_to_customer,
+        server_comms.action_add_internal_note,
+        server_comms.get_message_status,
+    ]
+    return [StructuredTool.from_function(fn) for fn in functions] + [policy_lookup, get_current_date, summarize_case]
@@ -0,0 +1,102 @@
+"""Compares LLM calls and wall time per ticket, one-tool-per-turn loop vs plan-and-execute.
+
+Runs every README scenario in both graph modes with the scripted fake LLM and the in-process
+tools, approving sensitive actions automatically. `--llm-latency` and `--tool-latency` imitate
+a hosted model and remote MCP servers.
+
+    uv run app/benchmarks/plan_vs_loop.py --llm-latency 0.8 --tool-latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.agents.agent import build_graph
+from app.benchmarks.fake_chat import ScriptedChatModel
+from app.benchmarks.harness import ProxyTool, run_ticket
+from app.benchmarks.local_tools import in_process_tools
+from app.benchmarks.scenarios import SCENARIOS
+
+MODES = ("loop", "plan")
+
+
+class DelayedTool(ProxyTool):
+    """Adds a fixed network-like delay in front of a tool call."""
+
+    delay: float
+
+    def _run(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        time.sleep(self.delay)
+        return super()._run(*args, config=config, **kwargs)
+
+    async def _arun(self, *args: Any, config: RunnableConfig, run_manager: Any = None, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.delay)
+        return await super()._arun(*args, config=config, **kwargs)
+
+
+async def measure_ticket(mode: str, prompt: str, llm_latency: float, tool_latency: float) -> Dict[str, Any]:
+    """Runs one ticket to its final answer and returns LLM calls, tool calls and wall time."""
+    llm = ScriptedChatModel(latency=llm_latency)
+    tools = [DelayedTool(t, delay=tool_latency) for t in in_process_tools()]
+    graph = build_graph(tools, MemorySaver(), llm=llm, step_delay=0, mode=mode)
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    start = time.perf_counter()
+    result = await run_ticket(graph, prompt, config)
+    wall = time.perf_counter() - start
+
+    tool_calls = sum(len(getattr(m, "tool_calls", None) or []) for m in result["messages"])
+    return {
+        "llm_calls": llm.calls,
+        "planner_calls": llm.call_log.count("planner"),
+        "tool_calls": tool_calls,
+        "wall": wall,
+        "answer": result["messages"][-1].content,
+    }
+
+
+async def compare(llm_latency: float, tool_latency: float) -> List[Dict[str, Any]]:
+    rows = []
+    for scenario in SCENARIOS:
+        row: Dict[str, Any] = {"scenario": scenario.name}
+        for mode in MODES:
+            row[mode] = await measure_ticket(mode, scenario.prompt, llm_latency, tool_latency)
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    print("scenario             tools   LLM loop  LLM plan     wall loop(s)  wall plan(s)  same answer")
+    totals = {mode: {"llm_calls": 0, "wall": 0.0} for mode in MODES}
+    for row in rows:
+        loop, plan = row["loop"], row["plan"]
+        print(f"{row['scenario']:<20} {loop['tool_calls']:5d} {loop['llm_calls']:10d} {plan['llm_calls']:9d} "
+              f"{loop['wall']:16.2f} {plan['wall']:13.2f}  {loop['answer'] == plan['answer']}")
+        for mode in MODES:
+            totals[mode]["llm_calls"] += row[mode]["llm_calls"]
+            totals[mode]["wall"] += row[mode]["wall"]
+
+    n = len(rows)
+    print(f"\nPer ticket: loop {totals['loop']['llm_calls'] / n:.2f} LLM calls / {totals['loop']['wall'] / n:.2f}s, "
+          f"plan {totals['plan']['llm_calls'] / n:.2f} LLM calls / {totals['plan']['wall'] / n:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LLM calls and wall time per ticket, loop vs plan mode.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake LLM call.")
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="Seconds per tool call.")
+    args = parser.parse_args()
+
+    print_report(asyncio.run(compare(args.llm_latency, args.tool_latency)))
+
+
+if __name__ == "__main__":
+    main()
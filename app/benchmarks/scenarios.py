@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+ToolCallSpec = Tuple[str, Dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    """A README verification prompt and the tool calls a well-behaved model makes for it.
+
+    `steps` is the one-round-at-a-time script of the default loop. `plan` is the DAG the
+    plan-and-execute planner emits instead, and `after_plan` the tool rounds still left for
+    the agent after the plan ran (side effects, which are never planned).
+    """
+    name: str
+    prompt: str
+    steps: List[List[ToolCallSpec]] = field(default_factory=list)
+    final: str = ""
+    plan: List[Dict[str, Any]] = field(default_factory=list)
+    after_plan: List[List[ToolCallSpec]] = field(default_factory=list)
+
+
+# Mirrors the "Verification Prompts" section of README.md.
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        name="ambiguity",
+        prompt="Find the customer profile for Alice.",
+        steps=[
+            [("get_current_date", {})],
+            [("get_customer_profile", {"name": "Alice"})],
+        ],
+        final="I found two customers named Alice: Alice Diamond (CUST_001) and Alice Silver (CUST_999). "
+              "Which one do you mean?",
+        plan=[
+            {"id": "s1", "tool": "get_current_date", "args": {}},
+            {"id": "s2", "tool": "get_customer_profile", "args": {"name": "Alice"}},
+            {"id": "s3", "tool": "get_customer_orders", "args": {"customer_id": "{s2.ID}"}, "depends_on": ["s2"]},
+        ],
+    ),
+    Scenario(
+        name="policy_vs_context",
+        prompt="Bob Gold wants to return his Gold Ring from the last order.",
+        steps=[
+            [("get_current_date", {})],
+            [("get_customer_profile", {"name": "Bob Gold"})],
+            [("get_customer_orders", {"customer_id": "CUST_002"})],
+            [("get_order_details", {"order_id": "ORD_102"})],
+            [("policy_lookup", {"query": "return"})],
+        ],
+        final="The 30-day return window has passed, but ORD_102 is still PROCESSING and was never delivered, "
+              "so Bob is eligible for a refund.",
+        plan=[
+            {"id": "s1", "tool": "get_current_date", "args": {}},
+            {"id": "s2", "tool": "get_customer_profile", "args": {"name": "Bob Gold"}},
+            {"id": "s3", "tool": "get_customer_orders", "args": {"customer_id": "{s2.ID}"}, "depends_on": ["s2"]},
+            {"id": "s4", "tool": "get_order_details", "args": {"order_id": "{s3.Order ID}"}, "depends_on": ["s3"]},
+            {"id": "s5", "tool": "policy_lookup", "args": {"query": "return"}},
+        ],
+    ),
+    Scenario(
+        name="human_in_the_loop",
+        prompt="Process a refund for Bob Gold's order ORD_102.",
+        steps=[
+            [("get_current_date", {})],
+            [("get_order_details", {"order_id": "ORD_102"})],
+            [("policy_lookup", {"query": "return"})],
+            [("action_process_refund", {"order_id": "ORD_102", "reason": "Item never delivered"})],
+        ],
+        final="The refund for ORD_102 has been processed.",
+        plan=[
+            {"id": "s1", "tool": "get_current_date", "args": {}},
+            {"id": "s2", "tool": "get_order_details", "args": {"order_id": "ORD_102"}},
+            {"id": "s3", "tool": "policy_lookup", "args": {"query": "return"}},
+        ],
+        after_plan=[
+            [("action_process_refund", {"order_id": "ORD_102", "reason": "Item never delivered"})],
+        ],
+    ),
+    Scenario(
+        name="inventory_vip",
+        prompt="Check the stock for Sapphire Necklace and tell me if Alice Diamond is a VIP.",
+        steps=[
+            [("get_current_date", {})],
+            [("check_inventory", {"item_name": "Sapphire Necklace"}),
+             ("get_customer_profile", {"name": "Alice Diamond"})],
+        ],
+        final="There are 5 Sapphire Necklaces in Vault A, and Alice Diamond is a VIP.",
+        plan=[
+            {"id": "s1", "tool": "get_current_date", "args": {}},
+            {"id": "s2", "tool": "check_inventory", "args": {"item_name": "Sapphire Necklace"}},
+            {"id": "s3", "tool": "get_customer_profile", "args": {"name": "Alice Diamond"}},
+        ],
+    ),
+]
+
+
+def find_scenario(prompt: str) -> Optional[Scenario]:
+    for scenario in SCENARIOS:
+        if scenario.prompt == prompt:
+            return scenario
+    return None
@@ -0,0 +1,36 @@
+"""Standalone Comms outbox worker.
+
+Over stdio every Comms tool call runs in a short-lived server process that only queues the message.
+This long-lived worker delivers it. The agent starts one automatically in stdio mode; run it by hand
+when the stdio servers are driven by another MCP client:
+
+    uv run app/mcp_servers/comms_worker.py
+"""
+import logging
+import os
+import signal
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.mcp_servers.outbox import Outbox, OutboxWorker, FakeSink, default_outbox_path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(name)s] %(levelname)s: %(message)s",
+    stream=sys.stderr
+)
+
+if __name__ == "__main__":
+    # Stop cleanly on SIGTERM (e.g. from the agent's supervisor), so a batch in flight is finished.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    worker = OutboxWorker(Outbox(default_outbox_path()), FakeSink())
+    worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
@@ -0,0 +1,81 @@
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from sqlite3 import Connection
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger("DB_POOL")
+
+
+class SqlitePool:
+    """A pool of read-only SQLite connections plus a single serialized writer.
+
+    The database runs in WAL mode, so readers never wait for the writer and only ever see
+    committed data. Without a `path` it lives in a private temporary directory that is removed
+    when the pool is garbage collected or the process exits normally. `serving.run_server` turns
+    SIGTERM into a normal exit; a SIGKILLed server leaves the directory behind.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            init_schema: Optional[Callable[[Connection], None]] = None,
+            readers: int = 4,
+            path: Optional[str] = None,
+            acquire_timeout: float = 10.0,
+    ) -> None:
+        if not path:
+            # Not a shared-cache in-memory DB: its readers would need read_uncommitted (dirty reads)
+            # to avoid table locks against the writer.
+            directory = tempfile.mkdtemp(prefix=f"{name}_")
+            weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+            path = os.path.join(directory, f"{name}.db")
+        self._uri = f"file:{path}"
+        self.acquire_timeout = acquire_timeout
+        self._write_lock = threading.Lock()
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        if init_schema:
+            init_schema(self._writer)
+            self._writer.commit()
+
+        self._readers: "queue.Queue[Connection]" = queue.Queue()
+        for _ in range(max(1, readers)):
+            connection = self._connect()
+            connection.execute("PRAGMA query_only=ON")
+            self._readers.put(connection)
+
+        logger.info(f"Opened pool '{name}' with {self._readers.qsize()} readers and 1 writer.")
+
+    def _connect(self) -> Connection:
+        return sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def reader(self) -> Iterator[Connection]:
+        """Borrows a read connection for the duration of the block."""
+        try:
+            connection = self._readers.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError("No read connection available.")
+        try:
+            yield connection
+        finally:
+            self._readers.put(connection)
+
+    @contextmanager
+    def writer(self) -> Iterator[Connection]:
+        """Runs the block on the single writer connection and commits it, or rolls back on error."""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from sqlite3 import Connection
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("COMMS_OUTBOX")
+
+PENDING = "PENDING"
+SENT = "SENT"
+FAILED = "FAILED"
+
+
+def default_outbox_path() -> str:
+    return os.getenv("COMMS_OUTBOX_PATH", os.path.join(tempfile.gettempdir(), "jewelryops_comms_outbox.db"))
+
+
+def content_hash(kind: str, payload: Dict[str, Any]) -> str:
+    canonical = json.dumps({"kind": kind, "payload": payload}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Outbox:
+    """Durable SQLite queue for Comms side effects (emails, internal notes).
+
+    An explicit idempotency key dedupes forever; the caller decides its scope (e.g. a ticket ID).
+    Without one, an identical message is only treated as a repeat of the same tool call within
+    `dedupe_window` seconds, so the same email can legitimately be sent again later.
+    """
+
+    def __init__(self, path: str, dedupe_window: float = 300.0) -> None:
+        self.path = path
+        self.dedupe_window = dedupe_window
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> Connection:
+        # Autocommit mode, so claims can use an explicit BEGIN IMMEDIATE across processes.
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, kind TEXT, payload TEXT, "
+            "status TEXT, attempts INT, next_attempt_at REAL, last_error TEXT, "
+            "created_at REAL, delivered_at REAL, content_hash TEXT)"
+        )
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(outbox)")]
+        if "content_hash" not in columns:  # Outbox files created before content_hash existed
+            connection.execute("ALTER TABLE outbox ADD COLUMN content_hash TEXT")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_outbox_content ON outbox (content_hash, created_at)")
+        return connection
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Stores a message and returns its record, with `duplicate` set when an earlier one was returned instead."""
+        digest = content_hash(kind, payload)
+        now = time.time()
+        with self._lock:
+            if idempotency_key:
+                existing = self._get_by("idempotency_key", idempotency_key)
+            else:
+                cursor = self._conn.execute(
+                    "SELECT * FROM outbox WHERE content_hash = ? AND idempotency_key IS NULL AND created_at >= ? "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (digest, now - self.dedupe_window),
+                )
+                row = cursor.fetchone()
+                existing = self._to_dict(cursor, row) if row else None
+            if existing:
+                logger.info(f"Duplicate enqueue of {kind}, returning {existing['id']}")
+                existing["duplicate"] = True
+                return existing
+
+            message_id = f"MSG_{uuid.uuid4().hex[:12].upper()}"
+            try:
+                self._conn.execute(
+                    "INSERT INTO outbox (id, idempotency_key, kind, payload, status, attempts, next_attempt_at, "
+                    "last_error, created_at, delivered_at, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?, NULL, ?, NULL, ?)",
+                    (message_id, idempotency_key or None, kind, json.dumps(payload), PENDING, now, now, digest),
+                )
+            except sqlite3.IntegrityError:
+                # Another process sharing the file (e.g. a second HTTP server) inserted the same key
+                # between our check and this insert. The thread lock only covers this process.
+                existing = self._get_by("idempotency_key", idempotency_key) if idempotency_key else None
+                if not existing:
+                    raise
+                logger.info(f"Duplicate enqueue of {kind} from another process, returning {existing['id']}")
+                existing["duplicate"] = True
+                return existing
+            record = self._get_by("id", message_id)
+
+        logger.info(f"Queued {kind} as {message_id}")
+        record["duplicate"] = False
+        return record
+
+    def get(self, message_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get_by("id", message_id)
+
+    def due(self, limit: int, lease: float = 30.0) -> List[Dict[str, Any]]:
+        """Claims up to `limit` pending messages whose retry time has come.
+
+        Claimed messages are pushed `lease` seconds into the future, so workers in other processes
+        sharing the file skip them. If this worker dies mid-delivery they become due again.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY created_at LIMIT ?",
+                    (PENDING, now, limit),
+                )
+                batch = [self._to_dict(cursor, row) for row in cursor.fetchall()]
+                self._conn.executemany("UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                                       [(now + lease, m["id"]) for m in batch])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return batch
+
+    def mark_sent(self, message_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, delivered_at = ?, last_error = NULL "
+                "WHERE id = ?",
+                (SENT, time.time(), message_id),
+            )
+
+    def mark_failed(self, message_id: str, error: str, next_attempt_at: Optional[float]) -> None:
+        """Records a failed attempt. Without `next_attempt_at` the message is given up on."""
+        status = PENDING if next_attempt_at is not None else FAILED
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE id = ?",
+                (status, next_attempt_at or time.time(), error, message_id),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _get_by(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        cursor = self._conn.execute(f"SELECT * FROM outbox WHERE {column} = ?", (value,))
+        row = cursor.fetchone()
+        return self._to_dict(cursor, row) if row else None
+
+    @staticmethod
+    def _to_dict(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+        record = {col[0]: value for col, value in zip(cursor.description, row)}
+        record["payload"] = json.loads(record["payload"])
+        return record
+
+
+class FakeSink:
+    """Local stand-in for SMTP and the CRM notes API. Records every delivery it accepts."""
+
+    def __init__(self, fail_times: int = 0) -> None:
+        self.fail_times = fail_times
+        self.delivered: List[Dict[str, Any]] = []
+
+    def deliver(self, batch: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """Delivers a batch and returns {message_id: error or None}."""
+        results = {}
+        for message in batch:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                results[message["id"]] = "FAKE_SINK: connection refused"
+                continue
+            logger.info(f"[FAKE SINK] Delivered {message['kind']} {message['id']}: {message['payload']}")
+            self.delivered.append(message)
+            results[message["id"]] = None
+        return results
+
+
+class OutboxWorker:
+    """Background thread that drains the outbox in batches, retrying failures with exponential backoff."""
+
+    def __init__(
+            self,
+            outbox: Outbox,
+            sink: FakeSink,
+            batch_size: int = 20,
+            poll_interval: float = 0.5,
+            max_attempts: int = 5,
+            base_backoff: float = 1.0,
+            max_backoff: float = 60.0,
+    ) -> None:
+        self.outbox = outbox
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+
+    def run_once(self) -> int:
+        """Delivers one batch of due messages. Returns how many were picked up."""
+        batch = self.outbox.due(self.batch_size)
+        if not batch:
+            return 0
+
+        try:
+            results = self.sink.deliver(batch)
+        except Exception as e:
+            logger.error(f"Sink failed for the whole batch: {e}")
+            results = {message["id"]: str(e) for message in batch}
+
+        for message in batch:
+            error = results.get(message["id"], "No delivery result")
+            if error is None:
+                self.outbox.mark_sent(message["id"])
+                continue
+
+            attempts = message["attempts"] + 1
+            if attempts >= self.max_attempts:
+                logger.error(f"Giving up on {message['id']} after {attempts} attempts: {error}")
+                self.outbox.mark_failed(message["id"], error, None)
+            else:
+                delay = self.backoff(attempts)
+                logger.warning(f"Delivery of {message['id']} failed ({error}), retrying in {delay:.1f}s")
+                self.outbox.mark_failed(message["id"], error, time.time() + delay)
+
+        return len(batch)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="outbox-worker", daemon=True)
+        self._thread.start()
+        logger.info("Outbox worker started.")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}", exc_info=True)
+                processed = 0
+            # A full batch means there is probably more waiting, so skip the sleep.
+            if processed < self.batch_size:
+                self._stop.wait(self.poll_interval)
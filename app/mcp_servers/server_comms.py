@@ -1,7 +1,13 @@
 import logging
+import os
 import sys
 from mcp.server.fastmcp import FastMCP
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.mcp_servers.outbox import Outbox, OutboxWorker, FakeSink, default_outbox_path
+from app.mcp_servers.serving import threaded_tool, run_server, server_args
+
 logging.basicConfig(
     level=logging.INFO,
     format="[%(name)s] %(levelname)s: %(message)s",
@@ -9,22 +15,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger("COMMS_SERVER")
 
+OUTBOX_PATH = default_outbox_path()
+
+outbox = Outbox(OUTBOX_PATH)
+worker = OutboxWorker(outbox, FakeSink())
 mcp = FastMCP("JewelryComms")
 
 
-@mcp.tool()
-def action_send_email_to_customer(email: str, subject: str, body: str) -> str:
+def duplicate_notice(what: str, record: dict) -> str:
+    return (f"DUPLICATE: An identical {what} was already queued as {record['id']} (Status: {record['status']}). "
+            f"It was NOT sent again. Pass a new idempotency_key if it really must be sent twice.")
+
+
+@threaded_tool(mcp)
+def action_send_email_to_customer(email: str, subject: str, body: str, idempotency_key: str = "") -> str:
     """[SIDE EFFECT] Sends an email to the customer. Requires confirmation."""
-    logger.info(f"Sending email to {email} with subject: {subject}")
-    return f"SUCCESS: Email sent to {email}. Subject: '{subject}'"
+    logger.info(f"Queueing email to {email} with subject: {subject}")
+    record = outbox.enqueue("email", {"email": email, "subject": subject, "body": body}, idempotency_key or None)
+    if record["duplicate"]:
+        return duplicate_notice(f"email to {email}", record)
+    return f"SUCCESS: Email to {email} queued for delivery. Subject: '{subject}' | Message ID: {record['id']}"
 
 
-@mcp.tool()
-def action_add_internal_note(customer_id: str, note: str) -> str:
+@threaded_tool(mcp)
+def action_add_internal_note(customer_id: str, note: str, idempotency_key: str = "") -> str:
     """[SIDE EFFECT] Log a note to the customer's permanent record."""
-    logger.info(f"Adding note to customer {customer_id}: {note}")
-    return f"SUCCESS: Note added to Customer {customer_id}: '{note}'"
+    logger.info(f"Queueing note for customer {customer_id}: {note}")
+    record = outbox.enqueue("note", {"customer_id": customer_id, "note": note}, idempotency_key or None)
+    if record["duplicate"]:
+        return duplicate_notice(f"note for Customer {customer_id}", record)
+    return f"SUCCESS: Note for Customer {customer_id} queued: '{note}' | Message ID: {record['id']}"
+
+
+@threaded_tool(mcp)
+def get_message_status(message_id: str) -> str:
+    """Check the delivery status of a queued email or note by its Message ID."""
+    record = outbox.get(message_id)
+    if not record:
+        return "Message ID not found."
+
+    status = f"Message {record['id']} | Type: {record['kind']} | Status: {record['status']} | Attempts: {record['attempts']}"
+    if record["last_error"]:
+        status += f" | Last error: {record['last_error']}"
+    return status
 
 
 if __name__ == "__main__":
-    mcp.run()
+    args = server_args(mcp.name, 8003)
+    if args.transport == "stdio":
+        # This process lives for a single tool call, so it only queues. The long-lived
+        # comms_worker.py (started by the agent) delivers, off the reply's critical path.
+        run_server(mcp, 8003, args)
+    else:
+        worker.start()
+        try:
+            run_server(mcp, 8003, args)
+        finally:
+            worker.stop()
@@ -1,9 +1,14 @@
-import sqlite3
+import os
 from sqlite3 import Connection
 import logging
 import sys
 from mcp.server.fastmcp import FastMCP
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.mcp_servers.db_pool import SqlitePool
+from app.mcp_servers.serving import threaded_tool, run_server
+
 logging.basicConfig(
     level=logging.INFO,
     format="[%(name)s] %(levelname)s: %(message)s",
@@ -12,9 +17,8 @@ logging.basicConfig(
 logger = logging.getLogger("CRM_SERVER")
 
 
-def init_db() -> Connection:
-    """Initialize in-memory database with mock customer data."""
-    connection = sqlite3.connect(":memory:", check_same_thread=False)
+def create_schema(connection: Connection) -> None:
+    """Create the customer tables and load the mock data."""
     cursor = connection.cursor()
 
     # Customers table
@@ -22,23 +26,27 @@ def init_db() -> Connection:
     cursor.execute("INSERT INTO customers VALUES ('CUST_001', 'Alice Diamond', 'alice.d@example.com', 1)")
     cursor.execute("INSERT INTO customers VALUES ('CUST_999', 'Alice Silver', 'alice.s@example.com', 0)")
     cursor.execute("INSERT INTO customers VALUES ('CUST_002', 'Bob Gold', 'bob@example.com', 0)")
+    cursor.execute("CREATE INDEX idx_customers_name ON customers (name)")
+
 
-    connection.commit()
-    return connection
+def init_db() -> SqlitePool:
+    """Initialize a fresh, throwaway database with mock customer data."""
+    return SqlitePool("crm", create_schema, readers=int(os.getenv("MCP_DB_READERS", "4")))
 
 
-conn = init_db()
+pool = init_db()
 mcp = FastMCP("JewelryCRM")
 
 
-@mcp.tool()
+@threaded_tool(mcp)
 def get_customer_profile(name: str) -> str:
     """Look up a customer's email, ID, and VIP status by their name."""
     logger.info(f"Searching for customer name LIKE '%{name}%'")
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, vip_status FROM customers WHERE name LIKE ?", (f"%{name}%",))
-    rows = cursor.fetchall()
+    with pool.reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, email, vip_status FROM customers WHERE name LIKE ?", (f"%{name}%",))
+        rows = cursor.fetchall()
 
     if not rows:
         logger.warning(f"No customer found for query: {name}")
@@ -58,4 +66,4 @@ def get_customer_profile(name: str) -> str:
 
 
 if __name__ == "__main__":
-    mcp.run()
+    run_server(mcp, default_port=8001)
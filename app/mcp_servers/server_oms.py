@@ -1,9 +1,14 @@
-import sqlite3
+import os
 from sqlite3 import Connection
 import logging
 import sys
 from mcp.server.fastmcp import FastMCP
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.mcp_servers.db_pool import SqlitePool
+from app.mcp_servers.serving import threaded_tool, run_server
+
 logging.basicConfig(
     level=logging.INFO,
     format="[%(name)s] %(levelname)s: %(message)s",
@@ -12,9 +17,8 @@ logging.basicConfig(
 logger = logging.getLogger("OMS_SERVER")
 
 
-def init_db() -> Connection:
-    """Initialize in-memory database with mock order data."""
-    conn = sqlite3.connect(":memory:", check_same_thread=False)
+def create_schema(conn: Connection) -> None:
+    """Create the order tables and load the mock data."""
     cursor = conn.cursor()
 
     # Orders Table
@@ -34,64 +38,80 @@ def init_db() -> Connection:
     cursor.execute("INSERT INTO inventory VALUES ('Sapphire Necklace', 5, 'Vault A')")
     cursor.execute("INSERT INTO inventory VALUES ('Gold Ring', 12, 'Display Case')")
 
-    conn.commit()
-    return conn
+    # Refunds Table
+    cursor.execute("CREATE TABLE refunds (order_id TEXT, reason TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+
+    cursor.execute("CREATE INDEX idx_orders_id ON orders (id)")
+    cursor.execute("CREATE INDEX idx_orders_customer ON orders (customer_id)")
+    cursor.execute("CREATE INDEX idx_order_items_order ON order_items (order_id)")
+    cursor.execute("CREATE INDEX idx_inventory_item ON inventory (item)")
+
 
+def init_db() -> SqlitePool:
+    """Initialize a fresh, throwaway database with mock order data."""
+    return SqlitePool("oms", create_schema, readers=int(os.getenv("MCP_DB_READERS", "4")))
 
-conn = init_db()
+
+pool = init_db()
 mcp = FastMCP("JewelryOMS")
 
 
-@mcp.tool()
+@threaded_tool(mcp)
 def get_customer_orders(customer_id: str) -> str:
     """Returns a list of Order IDs and Dates for a customer. DOES NOT show items or status."""
     logger.info(f"Fetching orders for Customer: {customer_id}")
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, date FROM orders WHERE customer_id = ?", (customer_id,))
-    rows = cursor.fetchall()
+    with pool.reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, date FROM orders WHERE customer_id = ?", (customer_id,))
+        rows = cursor.fetchall()
     if not rows:
         return "No orders found."
     return "\n".join([f"Order ID: {r[0]} | Date: {r[1]}" for r in rows])
 
 
-@mcp.tool()
+@threaded_tool(mcp)
 def get_order_details(order_id: str) -> str:
     """Get the Status and Items for a specific Order ID."""
     logger.info(f"Fetching details for Order: {order_id}")
 
-    cursor = conn.cursor()
+    with pool.reader() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("SELECT status FROM orders WHERE id = ?", (order_id,))
-    status_res = cursor.fetchone()
-    if not status_res:
-        return "Order ID not found."
+        cursor.execute("SELECT status FROM orders WHERE id = ?", (order_id,))
+        status_res = cursor.fetchone()
+        if not status_res:
+            return "Order ID not found."
 
-    cursor.execute("SELECT item, qty FROM order_items WHERE order_id = ?", (order_id,))
-    items_res = cursor.fetchall()
+        cursor.execute("SELECT item, qty FROM order_items WHERE order_id = ?", (order_id,))
+        items_res = cursor.fetchall()
 
     items_str = ", ".join([f"{r[1]}x {r[0]}" for r in items_res])
     return f"Order {order_id}\nStatus: {status_res[0]}\nItems: {items_str}"
 
 
-@mcp.tool()
+@threaded_tool(mcp)
 def check_inventory(item_name: str) -> str:
     """Check system stock levels for an item."""
     logger.info(f"Checking inventory for: {item_name}")
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT stock, location FROM inventory WHERE item LIKE ?", (f"%{item_name}%",))
-    if res := cursor.fetchone():
+    with pool.reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT stock, location FROM inventory WHERE item LIKE ?", (f"%{item_name}%",))
+        res = cursor.fetchone()
+    if res:
         return f"Item: {item_name} | System Stock: {res[0]} | Location: {res[1]}"
     return "Item not found in inventory."
 
 
-@mcp.tool()
+@threaded_tool(mcp)
 def action_process_refund(order_id: str, reason: str) -> str:
     """[SIDE EFFECT] Process a full refund. Use ONLY after policy check."""
     logger.warning(f"PROCESSING REFUND: Order {order_id} | Reason: {reason}")
+    with pool.writer() as conn:
+        conn.execute("INSERT INTO refunds (order_id, reason) VALUES (?, ?)", (order_id, reason))
     return f"SUCCESS: Refund processed for {order_id}. Reason: {reason}"
 
 
 if __name__ == "__main__":
-    mcp.run()
+    run_server(mcp, default_port=8002)
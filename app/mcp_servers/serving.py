@@ -0,0 +1,60 @@
+import argparse
+import functools
+import logging
+import os
+import signal
+import sys
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio.to_thread
+from mcp.server.fastmcp import FastMCP
+
+logger = logging.getLogger("MCP_SERVING")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def threaded_tool(mcp: FastMCP) -> Callable[[F], F]:
+    """Registers a sync tool that runs in a worker thread instead of on the server's event loop.
+
+    FastMCP calls sync tools inline, so one slow query would block every other session.
+    The plain function is returned unchanged so it can still be called directly.
+    """
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        async def offloaded(*args: Any, **kwargs: Any) -> Any:
+            return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+        mcp.add_tool(offloaded, name=fn.__name__, description=fn.__doc__)
+        return fn
+
+    return decorator
+
+
+def server_args(name: str, default_port: int) -> argparse.Namespace:
+    """Parses the transport, host and port a server was started with."""
+    parser = argparse.ArgumentParser(description=f"{name} MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"],
+                        default=os.getenv("MCP_TRANSPORT", "stdio").replace("_", "-"))
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=default_port)
+    return parser.parse_args()
+
+
+def run_server(mcp: FastMCP, default_port: int, args: Optional[argparse.Namespace] = None) -> None:
+    """Runs the server on stdio (default) or as a multi-session streamable HTTP server."""
+    args = args or server_args(mcp.name, default_port)
+
+    if args.transport == "streamable-http":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        if args.host not in ("127.0.0.1", "localhost", "::1"):
+            # The default DNS-rebinding guard only admits localhost Host headers.
+            mcp.settings.transport_security = None
+        logger.info(f"Serving {mcp.name} on http://{args.host}:{args.port}{mcp.settings.streamable_http_path}")
+
+    # Turn SIGTERM into a normal exit (uvicorn re-raises it after its graceful shutdown), so atexit
+    # cleanup such as removing a pool's temporary database still runs when a supervisor stops us.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    mcp.run(transport=args.transport)
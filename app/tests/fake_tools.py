@@ -0,0 +1,62 @@
+"""Deterministic stand-ins for the MCP tools, with the same names, arguments and output formats."""
+import sys
+import os
+from langchain_core.tools import tool
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.agent import policy_lookup, get_current_date
+
+
+@tool
+def get_customer_profile(name: str) -> str:
+    """Fake CRM lookup."""
+    if name == "Alice":
+        return ("ERROR: AMBIGUOUS_MATCH. Multiple customers found: Alice Diamond (ID: CUST_001), "
+                "Alice Silver (ID: CUST_999).")
+    return "ID: CUST_002 | Name: Bob Gold | Email: bob@example.com | Status: Regular"
+
+
+@tool
+def get_customer_orders(customer_id: str) -> str:
+    """Fake order list."""
+    return "Order ID: ORD_102 | Date: 2025-01-15"
+
+
+@tool
+def get_order_details(order_id: str) -> str:
+    """Fake order details."""
+    return f"Order {order_id}\nStatus: PROCESSING\nItems: 1x Gold Ring"
+
+
+@tool
+def check_inventory(item_name: str) -> str:
+    """Fake inventory."""
+    if item_name != "Sapphire Necklace":
+        return "Item not found in inventory."
+    return "Item: Sapphire Necklace | System Stock: 5 | Location: Vault A"
+
+
+@tool
+def action_process_refund(order_id: str, reason: str) -> str:
+    """Fake refund."""
+    return f"SUCCESS: Refund processed for {order_id}."
+
+
+@tool
+def action_send_email_to_customer(email: str, subject: str, body: str) -> str:
+    """Fake email."""
+    return f"SUCCESS: Email to {email} queued for delivery. | Message ID: MSG_1"
+
+
+@tool
+def get_message_status(message_id: str) -> str:
+    """Fake delivery status."""
+    return f"Message {message_id} | Type: email | Status: SENT | Attempts: 1"
+
+
+FAKE_TOOLS = [
+    get_customer_profile, get_customer_orders, get_order_details, check_inventory,
+    action_process_refund, action_send_email_to_customer, get_message_status,
+    policy_lookup, get_current_date,
+]
@@ -1,9 +1,10 @@
 import pytest
 import os
 import sys
-from unittest.mock import MagicMock, patch, AsyncMock
+from unittest.mock import patch, AsyncMock
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -14,6 +15,7 @@ from app.agents.agent import (
     get_current_date,
     summarize_case
 )
+from app.agents.resilience import ResilientTool
 
 
 # --- 1. LOCAL TOOLS: NEGATIVE & EDGE CASES ---
@@ -58,18 +60,27 @@ def test_summarize_case_empty():
 @pytest.mark.asyncio
 async def test_load_mcp_tools():
     """Test that tool loading combines remote and local tools correctly."""
-    with patch("app.agents.agent.MultiServerMCPClient") as MockClient:
+    with patch("app.agents.agent.MultiServerMCPClient") as MockClient, \
+            patch("app.agents.agent.get_comms_worker") as mock_worker:
         mock_instance = MockClient.return_value
 
-        mock_remote_tool = MagicMock()
-        mock_remote_tool.name = "remote_tool_1"
-        mock_instance.get_tools = AsyncMock(return_value=[mock_remote_tool])
+        async def fake_get_tools(server_name):
+            async def call(**kwargs):
+                return "ok"
+            return [StructuredTool.from_function(coroutine=call, name=f"{server_name}_tool", description="Remote tool.")]
+
+        mock_instance.get_tools = AsyncMock(side_effect=fake_get_tools)
 
         tools, client = await load_mcp_tools()
 
         assert client == mock_instance
-        assert len(tools) == 4
-        assert tools[0].name == "remote_tool_1"
+        assert len(tools) == 6
+        assert [t.name for t in tools[:3]] == ["crm_tool", "oms_tool", "comms_tool"]
+        # Remote tools are supervised, local ones are not
+        assert all(isinstance(t, ResilientTool) for t in tools[:3])
+        assert tools[0].server == "crm"
+        assert tools[3].name == "policy_lookup"
+        mock_worker.assert_called_once()
 
 
 # --- 3. AGENT LOGIC: ROUTING & CONTROL FLOW ---
@@ -0,0 +1,127 @@
+import sys
+import os
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.agent import build_graph, policy_lookup
+from app.agents.checkpoint import DeltaMessageSerializer, build_checkpointer, DELTA_TYPE
+
+
+def conversation(n: int) -> list:
+    messages = [SystemMessage(content="You are the JewelryOps Support Agent.", id="sys")]
+    for i in range(n):
+        messages.append(HumanMessage(content=f"question {i}", id=f"h{i}"))
+        messages.append(AIMessage(content="", id=f"a{i}",
+                                  tool_calls=[{"name": "policy_lookup", "args": {"query": "return"}, "id": f"c{i}"}]))
+        messages.append(ToolMessage(content="Returns allowed within 30 days. " * 50, tool_call_id=f"c{i}", id=f"t{i}"))
+    return messages
+
+
+def test_round_trip_is_exact():
+    """Test that a message list restores to exactly the same messages."""
+    serde = DeltaMessageSerializer()
+    messages = conversation(3)
+    type_, data = serde.dumps_typed(messages)
+
+    assert type_ == DELTA_TYPE
+    assert serde.loads_typed((type_, data)) == messages
+
+
+def test_append_only_stores_new_messages():
+    """Test that a longer list only adds its new messages to the store."""
+    serde = DeltaMessageSerializer()
+    serde.dumps_typed(conversation(5))
+    before = len(serde.store)
+
+    longer = conversation(5) + [HumanMessage(content="one more", id="extra")]
+    serde.dumps_typed(longer)
+
+    # One payload and one chain link for the appended message
+    assert len(serde.store) == before + 2
+
+
+def test_only_new_messages_are_serialized():
+    """Test that re-checkpointing a grown list serializes just the appended messages, not the whole history."""
+    serde = DeltaMessageSerializer()
+    messages = conversation(5)
+    serde.dumps_typed(messages)
+
+    with patch.object(serde, "_put_payload", wraps=serde._put_payload) as put_payload:
+        messages.append(HumanMessage(content="one more", id="extra"))
+        serde.dumps_typed(messages)
+        assert put_payload.call_count == 1
+
+        # A message that got a new ID is serialized again
+        messages[1].id = "h0-renamed"
+        serde.dumps_typed(messages)
+        assert put_payload.call_count == 2
+
+    assert serde.loads_typed(serde.dumps_typed(messages)) == messages
+
+
+def test_repeated_payloads_are_deduplicated():
+    """Test that identical messages are stored once, whatever list they appear in."""
+    serde = DeltaMessageSerializer()
+    serde.dumps_typed(conversation(2))
+    payloads = [k for k in serde.store if k.startswith("m:")]
+    serde.dumps_typed(conversation(2)[:3])
+    assert [k for k in serde.store if k.startswith("m:")] == payloads
+
+
+def test_large_payloads_are_compressed():
+    """Test that big tool results are compressed in the store."""
+    serde = DeltaMessageSerializer(compress_threshold=100)
+    big = ToolMessage(content="x" * 10_000, tool_call_id="c1", id="t1")
+    serde.dumps_typed([big])
+    assert serde.stored_bytes() < 1_000
+
+
+def test_other_values_round_trip():
+    """Edge Case: Non-message values, empty lists and large blobs."""
+    serde = DeltaMessageSerializer(compress_threshold=10)
+    for value in [None, [], {"a": 1}, {"blob": "y" * 5000}, b"raw", "text"]:
+        assert serde.loads_typed(serde.dumps_typed(value)) == value
+    assert serde.dumps_typed({"blob": "y" * 5000})[0].endswith("+zlib")
+
+
+def test_build_checkpointer_modes(monkeypatch):
+    """Test mode selection, including the CHECKPOINT_SERDE environment variable."""
+    assert not isinstance(build_checkpointer("default").serde, DeltaMessageSerializer)
+    assert isinstance(build_checkpointer("delta").serde, DeltaMessageSerializer)
+    monkeypatch.setenv("CHECKPOINT_SERDE", "delta")
+    assert isinstance(build_checkpointer().serde, DeltaMessageSerializer)
+
+
+def run_graph(checkpointer) -> list:
+    with patch("app.agents.agent.ChatGroq") as MockLLM:
+        mock_llm = MockLLM.return_value
+        mock_llm.bind_tools.return_value = mock_llm
+        mock_llm.invoke.side_effect = [
+            AIMessage(content="", id="a1", tool_calls=[{"name": "policy_lookup", "args": {"query": "return"}, "id": "c1"}]),
+            AIMessage(content="Returns are allowed within 30 days.", id="a2"),
+            AIMessage(content="", id="a3", tool_calls=[{"name": "policy_lookup", "args": {"query": "warranty"}, "id": "c2"}]),
+            AIMessage(content="Lifetime warranty on gemstones.", id="a4"),
+        ]
+        graph = build_graph([policy_lookup], checkpointer, step_delay=0)
+        config = {"configurable": {"thread_id": "delta"}}
+
+        for i, question in enumerate(["Return policy?", "Warranty?"]):
+            graph.invoke({"messages": [HumanMessage(content=question, id=f"h{i}")]}, config)
+            graph.invoke(None, config)  # Resume past the tools interrupt
+
+        return [
+            [m.model_dump(exclude={"id"}) for m in snapshot.values.get("messages", [])]
+            for snapshot in graph.get_state_history(config)
+        ]
+
+
+def test_graph_history_matches_default_checkpointer():
+    """CRITICAL: Every checkpoint restores to the same state as with the default serializer."""
+    default = run_graph(MemorySaver())
+    delta = run_graph(build_checkpointer("delta"))
+
+    assert len(delta) == len(default) > 4
+    assert delta == default
@@ -1,22 +1,97 @@
+import asyncio
 import sys
 import os
+import time
+import pytest
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.mcp_servers.server_comms import action_send_email_to_customer, action_add_internal_note
+from langchain_mcp_adapters.client import MultiServerMCPClient
 
+from app.agents import agent
+from app.agents.agent import get_server_connection
+from app.mcp_servers import server_comms
+from app.mcp_servers.outbox import Outbox, OutboxWorker, FakeSink, PENDING, SENT
 
-def test_send_email():
+
+@pytest.fixture
+def comms(monkeypatch, tmp_path):
+    """The Comms server module with its outbox and worker on a fresh file under tmp_path."""
+    path = str(tmp_path / "outbox.db")
+    monkeypatch.setenv("COMMS_OUTBOX_PATH", path)
+    outbox = Outbox(path)
+    monkeypatch.setattr(server_comms, "outbox", outbox)
+    monkeypatch.setattr(server_comms, "worker", OutboxWorker(outbox, FakeSink()))
+    return server_comms
+
+
+def test_send_email(comms):
     """Test that email tool returns the correct success message."""
-    result = action_send_email_to_customer("test@example.com", "Hello", "Body content")
+    result = comms.action_send_email_to_customer("test@example.com", "Hello", "Body content")
     assert "SUCCESS" in result
     assert "test@example.com" in result
     assert "Hello" in result
 
 
-def test_add_internal_note():
+def test_add_internal_note(comms):
     """Test that note tool returns the correct success message."""
-    result = action_add_internal_note("CUST_123", "Customer is happy")
+    result = comms.action_add_internal_note("CUST_123", "Customer is happy")
     assert "SUCCESS" in result
     assert "CUST_123" in result
     assert "Customer is happy" in result
+
+
+def test_send_email_twice_is_deduplicated(comms):
+    """Test that re-running an approved email does not send it twice."""
+    first = comms.action_send_email_to_customer("dup@example.com", "Refund", "Done")
+    second = comms.action_send_email_to_customer("dup@example.com", "Refund", "Done")
+    message_id = first.split("Message ID: ")[1]
+    assert second.startswith("DUPLICATE")
+    assert "NOT sent again" in second
+    assert message_id in second
+
+
+def test_message_status_after_delivery(comms):
+    """Test that the status tool reflects delivery by the worker."""
+    result = comms.action_add_internal_note("CUST_002", "Called about ORD_102")
+    message_id = result.split("Message ID: ")[1]
+
+    assert "PENDING" in comms.get_message_status(message_id)
+    comms.worker.run_once()
+    assert "SENT" in comms.get_message_status(message_id)
+
+
+def test_message_status_not_found(comms):
+    """Negative: Unknown message IDs."""
+    assert "not found" in comms.get_message_status("MSG_DOES_NOT_EXIST")
+
+
+@pytest.mark.asyncio
+async def test_email_over_stdio_is_delivered_by_worker(tmp_path, monkeypatch):
+    """Test that a stdio tool call returns once the email is queued, and the agent's long-lived worker sends it."""
+    outbox_path = str(tmp_path / "stdio_outbox.db")
+    monkeypatch.setenv("COMMS_OUTBOX_PATH", outbox_path)
+    monkeypatch.setenv("MCP_TRANSPORT", "stdio")
+    monkeypatch.setattr(agent, "_comms_worker", None)
+    connection = get_server_connection("comms")
+    connection["env"] = dict(os.environ)
+    client = MultiServerMCPClient({"comms": connection})
+    tools = {t.name: t for t in await client.get_tools(server_name="comms")}
+
+    result = await tools["action_send_email_to_customer"].ainvoke(
+        {"email": "bob@example.com", "subject": "Refund", "body": "Processed"})
+    message_id = str(result).split("Message ID: ")[1].split("'")[0].split('"')[0].strip()
+
+    outbox = Outbox(outbox_path)
+    assert outbox.get(message_id)["status"] == PENDING
+
+    supervisor = agent.get_comms_worker()
+    try:
+        deadline = time.monotonic() + 15
+        while outbox.get(message_id)["status"] == PENDING and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+    finally:
+        supervisor.stop()
+
+    assert outbox.get(message_id)["status"] == SENT
+    assert outbox.get(message_id)["attempts"] == 1
@@ -0,0 +1,106 @@
+import sys
+import os
+import threading
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.mcp_servers.db_pool import SqlitePool
+
+
+def create_schema(conn):
+    conn.execute("CREATE TABLE items (name TEXT)")
+    conn.execute("INSERT INTO items VALUES ('ring')")
+
+
+def count_items(pool: SqlitePool) -> int:
+    with pool.reader() as conn:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def test_readers_see_schema():
+    """Test that read connections share the temporary database created by the writer."""
+    pool = SqlitePool("test", create_schema, readers=2)
+    assert count_items(pool) == 1
+
+
+def test_pools_are_isolated():
+    """Test that two pools with the same name do not share data."""
+    first = SqlitePool("same", create_schema)
+    second = SqlitePool("same", create_schema)
+    with first.writer() as conn:
+        conn.execute("INSERT INTO items VALUES ('necklace')")
+    assert count_items(first) == 2
+    assert count_items(second) == 1
+
+
+def test_writer_commit_visible_to_readers():
+    """Test that committed writes are visible through the read pool."""
+    pool = SqlitePool("test", create_schema)
+    with pool.writer() as conn:
+        conn.execute("INSERT INTO items VALUES ('necklace')")
+    assert count_items(pool) == 2
+
+
+def test_writer_rolls_back_on_error():
+    """Negative: A failing write block leaves no partial data behind."""
+    pool = SqlitePool("test", create_schema)
+    with pytest.raises(RuntimeError):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO items VALUES ('necklace')")
+            raise RuntimeError("boom")
+    assert count_items(pool) == 1
+
+
+def test_readers_never_see_uncommitted_writes():
+    """Edge Case: A write that is rolled back is never visible to readers, even mid-transaction."""
+    pool = SqlitePool("test", create_schema)
+    with pytest.raises(RuntimeError):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO items VALUES ('necklace')")
+            assert count_items(pool) == 1
+            raise RuntimeError("boom")
+    assert count_items(pool) == 1
+
+
+def test_readers_are_read_only():
+    """Negative: Writes through a read connection are rejected."""
+    pool = SqlitePool("test", create_schema)
+    with pytest.raises(Exception):
+        with pool.reader() as conn:
+            conn.execute("INSERT INTO items VALUES ('necklace')")
+
+
+def test_pool_exhaustion_times_out():
+    """Edge Case: Waiting for a reader when all are borrowed."""
+    pool = SqlitePool("test", create_schema, readers=1, acquire_timeout=0.05)
+    with pool.reader():
+        with pytest.raises(TimeoutError):
+            with pool.reader():
+                pass
+
+
+def test_concurrent_readers():
+    """Test that many threads can read through the pool at once."""
+    pool = SqlitePool("test", create_schema, readers=4)
+    results = []
+
+    def read():
+        for _ in range(50):
+            results.append(count_items(pool))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [1] * 400
+
+
+def test_file_backed_pool(tmp_path):
+    """Test that a file path opens the database in WAL mode."""
+    pool = SqlitePool("test", create_schema, path=str(tmp_path / "data.db"))
+    with pool.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert count_items(pool) == 1
@@ -1,12 +1,15 @@
+import asyncio
 import pytest
 import sys
 import os
 from unittest.mock import patch
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool, ToolException
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.agents.agent import build_graph, policy_lookup
+from app.agents.resilience import CircuitBreaker, ResilientTool
 from langgraph.checkpoint.memory import MemorySaver
 
 
@@ -44,3 +47,67 @@ def test_tool_execution_failure():
         error_msg = str(e).lower()
         assert "validation error" in error_msg
         assert "input should be a valid string" in error_msg
+
+
+@pytest.mark.asyncio
+async def test_hung_mcp_server_does_not_freeze_graph():
+    """
+    CRITICAL TEST: A remote tool that never answers must give the LLM
+    an explicit SERVICE_UNAVAILABLE result instead of hanging the tools node.
+    """
+    async def hang(order_id: str) -> str:
+        await asyncio.sleep(60)
+        return "never"
+
+    remote = StructuredTool.from_function(coroutine=hang, name="get_order_details", description="Order details.")
+    tool = ResilientTool(remote, "oms", CircuitBreaker("oms"), timeout=0.2, hedge_delay=0.1)
+
+    with patch("app.agents.agent.ChatGroq") as MockLLM:
+        mock_llm = MockLLM.return_value
+        mock_llm.bind_tools.return_value = mock_llm
+        mock_llm.invoke.side_effect = [
+            AIMessage(content="", tool_calls=[{"name": "get_order_details", "args": {"order_id": "ORD_102"}, "id": "c1"}]),
+            AIMessage(content="The order system is unavailable right now."),
+        ]
+
+        graph = build_graph([tool], MemorySaver(), step_delay=0)
+        config = {"configurable": {"thread_id": "hung_test"}}
+        await graph.ainvoke({"messages": [HumanMessage(content="Status of ORD_102?")]}, config)
+        result = await asyncio.wait_for(graph.ainvoke(None, config), timeout=5)
+
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert "SERVICE_UNAVAILABLE" in tool_messages[0].content
+    assert result["messages"][-1].content == "The order system is unavailable right now."
+
+
+@pytest.mark.asyncio
+async def test_remote_tool_error_reaches_llm():
+    """
+    A tool error from a wrapped MCP tool (e.g. an unknown order ID) must come back
+    to the LLM as an error ToolMessage, not crash the turn.
+    """
+    async def details(order_id: str) -> str:
+        raise ToolException(f"Order {order_id} not found.")
+
+    remote = StructuredTool.from_function(coroutine=details, name="get_order_details", description="Order details.",
+                                          handle_tool_error=True)
+    tool = ResilientTool(remote, "oms", CircuitBreaker("oms"), timeout=1, hedge_delay=0.5)
+
+    with patch("app.agents.agent.ChatGroq") as MockLLM:
+        mock_llm = MockLLM.return_value
+        mock_llm.bind_tools.return_value = mock_llm
+        mock_llm.invoke.side_effect = [
+            AIMessage(content="", tool_calls=[{"name": "get_order_details", "args": {"order_id": "ORD_999"}, "id": "c1"}]),
+            AIMessage(content="I could not find order ORD_999."),
+        ]
+
+        graph = build_graph([tool], MemorySaver(), step_delay=0)
+        config = {"configurable": {"thread_id": "tool_error_test"}}
+        await graph.ainvoke({"messages": [HumanMessage(content="Status of ORD_999?")]}, config)
+        result = await graph.ainvoke(None, config)
+
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert tool_messages[0].status == "error"
+    assert tool_messages[0].content == "Order ORD_999 not found."
+    assert result["messages"][-1].content == "I could not find order ORD_999."
+    assert tool.breaker.state == "CLOSED"
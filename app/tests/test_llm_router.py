@@ -0,0 +1,247 @@
+import asyncio
+import json
+import pytest
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_openai import ChatOpenAI
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.agent import policy_lookup
+from app.agents.llm_router import Backend, RoutingChatModel, build_router_from_env, should_fail_over
+from app.agents.resilience import CLOSED, OPEN
+
+
+class FakeEndpoint:
+    """A local OpenAI-compatible /v1/chat/completions endpoint with configurable delay and failures."""
+
+    def __init__(self, delay: float = 0.0, status: int = 200, tool_call: bool = False):
+        self.delay = delay
+        self.status = status
+        self.tool_call = tool_call
+        self.requests = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                endpoint.requests.append(body)
+                time.sleep(endpoint.delay)
+                if endpoint.status != 200:
+                    payload = {"error": {"message": "rate limited", "type": "rate_limit"}}
+                else:
+                    payload = endpoint.completion()
+                data = json.dumps(payload).encode()
+                self.send_response(endpoint.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def completion(self):
+        message = {"role": "assistant", "content": f"answer from port {self.server.server_address[1]}"}
+        if self.tool_call:
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": "call_abc", "type": "function",
+                "function": {"name": "policy_lookup", "arguments": json.dumps({"query": "return"})},
+            }]}
+        return {"id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "fake",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoints():
+    created = []
+
+    def make(**kwargs):
+        endpoint = FakeEndpoint(**kwargs)
+        created.append(endpoint)
+        return endpoint
+
+    yield make
+    for endpoint in created:
+        endpoint.close()
+
+
+def backend(name, endpoint, **kwargs):
+    model = ChatOpenAI(model="fake", api_key="test", base_url=endpoint.url, max_retries=0, timeout=5)
+    return Backend(name, model, **kwargs)
+
+
+def test_routes_to_fastest_backend(endpoints):
+    """Test that once both backends were sampled, calls go to the faster one."""
+    slow, fast = endpoints(delay=0.2), endpoints(delay=0.0)
+    router = RoutingChatModel(backends=[backend("slow", slow), backend("fast", fast)], explore=0)
+
+    for _ in range(6):
+        router.invoke([HumanMessage(content="hi")])
+
+    assert len(slow.requests) == 1  # only the first, exploratory sample
+    assert len(fast.requests) == 5
+    assert router.stats()[1]["latency_ms"] < router.stats()[0]["latency_ms"]
+
+
+def test_failover_keeps_tool_calls(endpoints):
+    """Test that a failing backend is skipped and the tool call from the next one comes through intact."""
+    broken, healthy = endpoints(status=429), endpoints(tool_call=True)
+    router = RoutingChatModel(backends=[backend("broken", broken), backend("healthy", healthy)], explore=0)
+
+    reply = router.bind_tools([policy_lookup]).invoke([HumanMessage(content="Return policy?")])
+
+    assert reply.tool_calls == [{"name": "policy_lookup", "args": {"query": "return"}, "id": "call_abc",
+                                 "type": "tool_call"}]
+    assert reply.response_metadata["routed_to"] == "healthy"
+    assert broken.requests[0]["tools"][0]["function"]["name"] == "policy_lookup"
+    assert router.stats()[0]["error_rate"] == 1.0
+
+
+def test_failover_mid_conversation(endpoints):
+    """Test that a tool round started on one backend is sent in valid format to another one."""
+    healthy = endpoints()
+    router = RoutingChatModel(backends=[backend("healthy", healthy)], explore=0).bind_tools([policy_lookup])
+    history = [
+        HumanMessage(content="Return policy?"),
+        AIMessage(content="", tool_calls=[{"name": "policy_lookup", "args": {"query": "return"}, "id": "call_groq_1"}]),
+        ToolMessage(content="Returns accepted within 30 days.", tool_call_id="call_groq_1"),
+    ]
+
+    router.invoke(history)
+
+    sent = healthy.requests[0]["messages"]
+    assert sent[1]["tool_calls"][0]["id"] == "call_groq_1"
+    assert json.loads(sent[1]["tool_calls"][0]["function"]["arguments"]) == {"query": "return"}
+    assert sent[2] == {"role": "tool", "content": "Returns accepted within 30 days.", "tool_call_id": "call_groq_1"}
+
+
+def test_open_circuit_is_skipped(endpoints):
+    """Edge Case: A backend that keeps failing is taken out of rotation until its cool-down ends."""
+    broken, flaky = endpoints(status=500), endpoints(status=429)
+    router = RoutingChatModel(backends=[backend("broken", broken, failure_threshold=2),
+                                        backend("flaky", flaky, failure_threshold=2)], explore=0)
+
+    for _ in range(5):
+        with pytest.raises(Exception):
+            router.invoke([HumanMessage(content="hi")])
+
+    assert [b.breaker.state for b in router.backends] == [OPEN, OPEN]
+    assert len(broken.requests) == len(flaky.requests) == 2
+
+
+def test_all_backends_down_raises(endpoints):
+    """Edge Case: When every backend fails, the last error is raised to the caller."""
+    router = RoutingChatModel(backends=[backend("a", endpoints(status=500)), backend("b", endpoints(status=429))],
+                              explore=0)
+    with pytest.raises(Exception):
+        router.invoke([HumanMessage(content="hi")])
+
+
+def test_bad_request_is_not_failed_over(endpoints):
+    """Edge Case: A 400 (e.g. context too long) reaches the caller without failing over or tripping breakers."""
+    rejecting, healthy = endpoints(status=400), endpoints()
+    router = RoutingChatModel(backends=[backend("rejecting", rejecting, failure_threshold=1),
+                                        backend("healthy", healthy)], explore=0)
+
+    for _ in range(3):
+        with pytest.raises(Exception, match="400"):
+            router.invoke([HumanMessage(content="hi")])
+
+    assert len(rejecting.requests) == 3
+    assert healthy.requests == []
+    assert router.backends[0].breaker.state == CLOSED
+    assert router.stats()[0]["calls"] == 0
+
+
+def test_should_fail_over():
+    """Test which errors are the backend's fault and which are the request's."""
+    class StatusError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"Error code: {status_code}")
+            self.status_code = status_code
+
+    class APIConnectionError(Exception):
+        pass
+
+    assert should_fail_over(StatusError(429))
+    assert should_fail_over(StatusError(503))
+    assert should_fail_over(StatusError(401))  # this key is bad, another one may work
+    assert should_fail_over(TimeoutError())
+    assert should_fail_over(APIConnectionError("connection refused"))
+    assert not should_fail_over(StatusError(400))
+    assert not should_fail_over(ValueError("Invalid tool schema"))
+
+    wrapped = RuntimeError("Gemini call failed")
+    wrapped.__cause__ = StatusError(500)
+    assert should_fail_over(wrapped)
+
+
+@pytest.mark.asyncio
+async def test_async_failover(endpoints):
+    """Test the async path used by the graph's async nodes."""
+    router = RoutingChatModel(backends=[backend("broken", endpoints(status=500)), backend("healthy", endpoints())],
+                              explore=0)
+    reply = await router.ainvoke([HumanMessage(content="hi")])
+    assert reply.response_metadata["routed_to"] == "healthy"
+
+
+def test_build_router_from_env(monkeypatch, endpoints):
+    """Test that LLM_PROVIDERS creates one backend per provider key, and nothing when unset."""
+    monkeypatch.delenv("LLM_PROVIDERS", raising=False)
+    assert build_router_from_env() is None
+
+    monkeypatch.setenv("LLM_PROVIDERS", "openai,google")
+    monkeypatch.setenv("OPENAI_API_KEY", "key-1, key-2")
+    monkeypatch.setenv("OPENAI_BASE_URL", endpoints().url)
+    monkeypatch.setenv("GCP_API_KEY", "")
+    router = build_router_from_env()
+
+    assert [b.name for b in router.backends] == ["openai#1", "openai#2"]
+    assert router.invoke([HumanMessage(content="hi")]).content.startswith("answer from port")
+
+
+def test_timing_out_backend_ranks_last(endpoints):
+    """Edge Case: A backend that only ever times out is ranked behind a slower healthy one."""
+    bad_endpoint, good = endpoints(delay=0.5), endpoints(delay=0.05)
+    bad = Backend("bad", ChatOpenAI(model="fake", api_key="test", base_url=bad_endpoint.url, max_retries=0,
+                                    timeout=0.1), failure_threshold=10)
+    router = RoutingChatModel(backends=[bad, backend("good", good)], explore=0)
+
+    for _ in range(4):
+        assert router.invoke([HumanMessage(content="hi")]).response_metadata["routed_to"] == "good"
+
+    assert len(bad_endpoint.requests) == 1
+    assert bad.score == float("inf")
+    assert router._ranked() == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_releases_backend(endpoints):
+    """Edge Case: Cancelling a half-open trial call does not leave the backend locked out."""
+    slow = endpoints(delay=2)
+    only = backend("slow", slow, failure_threshold=1, reset_timeout=0.01)
+    router = RoutingChatModel(backends=[only], explore=0)
+    only.breaker.record_failure()
+    time.sleep(0.02)
+
+    task = asyncio.ensure_future(router.ainvoke([HumanMessage(content="hi")]))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert only.breaker.allow()
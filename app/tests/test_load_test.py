@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.benchmarks.fake_chat import ScriptedChatModel
+from app.benchmarks.load_test import percentile, checkpointer_bytes, run_load
+from app.benchmarks.scenarios import SCENARIOS
+from app.tests.fake_tools import FAKE_TOOLS
+
+
+def test_percentile():
+    """Test nearest-rank percentiles, including the empty case."""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_checkpointer_bytes_grows():
+    """Test that the size probe counts stored checkpoint data."""
+    saver = MemorySaver()
+    assert checkpointer_bytes(saver) == 0
+    saver.blobs[("t", "", "messages", "1")] = ("msgpack", b"x" * 100)
+    assert checkpointer_bytes(saver) == 100
+
+
+def test_scripted_model_follows_scenario():
+    """Test that the fake model replays each scripted step, then the final answer."""
+    scenario = SCENARIOS[0]
+    llm = ScriptedChatModel(latency=0)
+    messages = [HumanMessage(content=scenario.prompt)]
+
+    for step in scenario.steps:
+        reply = llm.invoke(messages)
+        assert [c["name"] for c in reply.tool_calls] == [name for name, _ in step]
+        messages.append(reply)
+        messages += [ToolMessage(content="ok", tool_call_id=c["id"]) for c in reply.tool_calls]
+
+    final = llm.invoke(messages)
+    assert final.content == scenario.final
+    assert llm.calls == len(scenario.steps) + 1
+
+
+def test_scripted_model_unknown_prompt():
+    """Edge Case: Prompts outside the scenario mix get a plain reply."""
+    reply = ScriptedChatModel(latency=0).invoke([HumanMessage(content="Hi")])
+    assert isinstance(reply, AIMessage)
+    assert not reply.tool_calls
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_metrics():
+    """Test a small load run end to end against local tools."""
+    report = await run_load(users=4, arrival_rate=0, turns=2, llm_latency=0.01, llm_jitter=0,
+                            sample_interval=0.05, tools=FAKE_TOOLS)
+
+    assert report["errors"] == 0
+    assert report["turns"] == 8
+    expected_llm_calls = 2 * sum(len(s.steps) + 1 for s in SCENARIOS)
+    assert report["llm_calls"] == expected_llm_calls
+    assert report["tool_calls"] == 2 * sum(len(step) for s in SCENARIOS for step in s.steps)
+    assert len(report["tool_queue_wait_s"]) == 3
+    assert report["turn_latency_s"][50] <= report["turn_latency_s"][99]
+    assert report["checkpoint_bytes"] > 0
+    assert report["peak_rss_mb"] > 0
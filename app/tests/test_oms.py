@@ -56,3 +56,13 @@ def test_process_refund():
     # ✅ FIX: The string must be exactly "SUCCESS: Refund processed"
     assert "SUCCESS: Refund processed" in result
     assert "ORD_101" in result
+
+
+def test_process_refund_is_recorded():
+    """Test that the refund goes through the single writer and is visible to readers."""
+    from app.mcp_servers.server_oms import pool
+
+    action_process_refund("ORD_102", "Never delivered")
+    with pool.reader() as conn:
+        rows = conn.execute("SELECT reason FROM refunds WHERE order_id = ?", ("ORD_102",)).fetchall()
+    assert ("Never delivered",) in rows
@@ -0,0 +1,141 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.mcp_servers.outbox import Outbox, OutboxWorker, FakeSink, PENDING, SENT, FAILED
+
+
+def make_outbox(tmp_path) -> Outbox:
+    return Outbox(str(tmp_path / "outbox.db"))
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    """Test that the same message content is only queued once."""
+    outbox = make_outbox(tmp_path)
+    first = outbox.enqueue("email", {"email": "bob@example.com", "subject": "Hi"})
+    second = outbox.enqueue("email", {"email": "bob@example.com", "subject": "Hi"})
+
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert first["id"] == second["id"]
+    assert outbox.counts() == {PENDING: 1}
+
+
+def test_content_dedupe_expires(tmp_path):
+    """Test that without a key, an identical message is only a duplicate inside the dedupe window."""
+    outbox = Outbox(str(tmp_path / "outbox.db"), dedupe_window=0.05)
+    first = outbox.enqueue("email", {"email": "bob@example.com", "subject": "Hi"})
+    time.sleep(0.06)
+    second = outbox.enqueue("email", {"email": "bob@example.com", "subject": "Hi"})
+
+    assert second["duplicate"] is False
+    assert first["id"] != second["id"]
+    assert outbox.counts() == {PENDING: 2}
+
+
+def test_claimed_messages_skipped_by_other_workers(tmp_path):
+    """Test that two outbox handles on one file (two processes) never claim the same message."""
+    make_outbox(tmp_path).enqueue("email", {"email": "bob@example.com"})
+    assert len(make_outbox(tmp_path).due(10)) == 1
+    assert make_outbox(tmp_path).due(10) == []
+
+
+def test_explicit_idempotency_key(tmp_path):
+    """Test that an explicit key wins over the content hash."""
+    outbox = make_outbox(tmp_path)
+    first = outbox.enqueue("note", {"customer_id": "CUST_001", "note": "A"}, "key-1")
+    second = outbox.enqueue("note", {"customer_id": "CUST_001", "note": "B"}, "key-1")
+    assert first["id"] == second["id"]
+
+
+def test_key_race_between_processes(tmp_path):
+    """Edge Case: Two outbox handles racing on one idempotency key return the same message, not an error."""
+    first, second = make_outbox(tmp_path), make_outbox(tmp_path)
+    lookup = first._get_by
+    raced = []
+
+    def racing_lookup(column, value):
+        if column == "idempotency_key" and not raced:
+            # The other process inserts between this check and our INSERT
+            raced.append(second.enqueue("email", {"email": "bob@example.com"}, "TICKET-7"))
+            return None
+        return lookup(column, value)
+
+    first._get_by = racing_lookup
+    record = first.enqueue("email", {"email": "bob@example.com"}, "TICKET-7")
+
+    assert record["duplicate"] is True
+    assert record["id"] == raced[0]["id"]
+    assert first.counts() == {PENDING: 1}
+
+
+def test_outbox_survives_reopen(tmp_path):
+    """Test that queued messages are durable across process restarts."""
+    record = make_outbox(tmp_path).enqueue("email", {"email": "a@example.com"})
+    reopened = make_outbox(tmp_path)
+    assert reopened.get(record["id"])["status"] == PENDING
+
+
+def test_worker_drains_in_batches(tmp_path):
+    """Test that the worker delivers at most one batch per run."""
+    outbox = make_outbox(tmp_path)
+    for i in range(5):
+        outbox.enqueue("note", {"customer_id": "CUST_002", "note": f"note {i}"})
+
+    sink = FakeSink()
+    worker = OutboxWorker(outbox, sink, batch_size=2)
+
+    assert worker.run_once() == 2
+    assert len(sink.delivered) == 2
+    worker.run_once()
+    worker.run_once()
+    assert worker.run_once() == 0
+    assert outbox.counts() == {SENT: 5}
+
+
+def test_worker_retries_with_backoff(tmp_path):
+    """Test that a failed delivery is retried only after its backoff expires."""
+    outbox = make_outbox(tmp_path)
+    record = outbox.enqueue("email", {"email": "bob@example.com"})
+    worker = OutboxWorker(outbox, FakeSink(fail_times=1), base_backoff=0.05)
+
+    worker.run_once()
+    failed = outbox.get(record["id"])
+    assert failed["status"] == PENDING
+    assert failed["attempts"] == 1
+    assert "connection refused" in failed["last_error"]
+    assert worker.run_once() == 0  # Still backing off
+
+    time.sleep(0.06)
+    worker.run_once()
+    assert outbox.get(record["id"])["status"] == SENT
+
+
+def test_worker_gives_up_after_max_attempts(tmp_path):
+    """Negative: A message that keeps failing ends up FAILED."""
+    outbox = make_outbox(tmp_path)
+    record = outbox.enqueue("email", {"email": "bob@example.com"})
+    worker = OutboxWorker(outbox, FakeSink(fail_times=10), max_attempts=2, base_backoff=0)
+
+    worker.run_once()
+    worker.run_once()
+    assert outbox.get(record["id"])["status"] == FAILED
+
+
+def test_background_worker_delivers(tmp_path):
+    """Test that the background thread drains the outbox on its own."""
+    outbox = make_outbox(tmp_path)
+    record = outbox.enqueue("email", {"email": "bob@example.com"})
+    worker = OutboxWorker(outbox, FakeSink(), poll_interval=0.01)
+
+    worker.start()
+    try:
+        deadline = time.time() + 2
+        while outbox.get(record["id"])["status"] != SENT and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+
+    assert outbox.get(record["id"])["status"] == SENT
@@ -0,0 +1,170 @@
+import pytest
+import sys
+import os
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.agent import build_graph
+from app.agents.planner import (
+    PLAN_EXECUTOR, PlanStep, UnresolvedReference, extract_field, is_failed_result, plan_waves, resolve_args,
+)
+from app.benchmarks.fake_chat import ScriptedChatModel
+from app.benchmarks.harness import run_ticket
+from app.benchmarks.scenarios import find_scenario, SCENARIOS
+from app.tests.fake_tools import FAKE_TOOLS
+
+
+def step(id_, depends_on=(), **args):
+    return PlanStep(id=id_, tool="policy_lookup", args=args, depends_on=list(depends_on))
+
+
+def test_plan_waves_groups_independent_steps():
+    """Test that steps without dependencies share the first wave."""
+    waves = plan_waves([step("s1"), step("s2"), step("s3", ["s2"]), step("s4", ["s1", "s3"])])
+    assert [[s.id for s in wave] for wave in waves] == [["s1", "s2"], ["s3"], ["s4"]]
+
+
+def test_plan_waves_rejects_bad_dependencies():
+    """Edge Case: Cycles and unknown step IDs are rejected, not executed."""
+    with pytest.raises(ValueError, match="cycle"):
+        plan_waves([step("s1", ["s2"]), step("s2", ["s1"])])
+    with pytest.raises(ValueError, match="unknown"):
+        plan_waves([step("s1", ["s9"])])
+
+
+def test_resolve_args_from_earlier_results():
+    """Test that {step.Field} references are filled from tool results."""
+    results = {
+        "s1": "ID: CUST_002 | Name: Bob Gold | Email: bob@example.com",
+        "s2": "Order ID: ORD_102 | Date: 2025-01-15\nOrder ID: ORD_100 | Date: 2024-12-01",
+    }
+    assert resolve_args({"customer_id": "{s1.ID}", "limit": 5}, results) == {"customer_id": "CUST_002", "limit": 5}
+    assert resolve_args({"order_id": "{s2.Order ID}"}, results) == {"order_id": "ORD_102"}
+    # "ID" must not match inside "Order ID"
+    assert extract_field("Order ID: ORD_102 | ID: X", "ID") == "X"
+
+
+def test_resolve_args_unresolved():
+    """Edge Case: A missing step result or field raises instead of passing the placeholder on."""
+    with pytest.raises(UnresolvedReference):
+        resolve_args({"customer_id": "{s1.ID}"}, {})
+    with pytest.raises(UnresolvedReference):
+        resolve_args({"customer_id": "{s1.ID}"}, {"s1": "ERROR: AMBIGUOUS_MATCH. Multiple customers found"})
+
+
+def test_is_failed_result():
+    """Test which results dependent steps cannot be built on."""
+    assert is_failed_result("ERROR: AMBIGUOUS_MATCH. Multiple customers found")
+    assert is_failed_result("Customer 'Zed' not found.")
+    assert not is_failed_result("ID: CUST_002 | Name: Bob Gold")
+
+
+@pytest.mark.asyncio
+async def test_plan_mode_runs_dag_then_synthesizes():
+    """Test that plan mode resolves dependent lookups in waves and needs one planner and one agent call."""
+    scenario = find_scenario("Bob Gold wants to return his Gold Ring from the last order.")
+    llm = ScriptedChatModel(latency=0)
+    graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=llm, step_delay=0, mode="plan")
+
+    result = await run_ticket(graph, scenario.prompt, {"configurable": {"thread_id": "plan-1"}})
+
+    waves = [m for m in result["messages"] if isinstance(m, AIMessage) and m.name == PLAN_EXECUTOR]
+    assert [len(w.tool_calls) for w in waves] == [3, 1, 1]
+    assert waves[1].tool_calls[0]["args"] == {"customer_id": "CUST_002"}
+    assert waves[2].tool_calls[0]["args"] == {"order_id": "ORD_102"}
+    assert len([m for m in result["messages"] if isinstance(m, ToolMessage)]) == 5
+    assert result["messages"][-1].content == scenario.final
+    assert llm.call_log == ["planner", "agent"]
+
+
+@pytest.mark.asyncio
+async def test_plan_mode_stops_on_ambiguity():
+    """Edge Case: An AMBIGUOUS_MATCH result skips dependent steps and goes to the agent without re-planning."""
+    scenario = find_scenario("Find the customer profile for Alice.")
+    llm = ScriptedChatModel(latency=0)
+    graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=llm, step_delay=0, mode="plan")
+
+    result = await run_ticket(graph, scenario.prompt, {"configurable": {"thread_id": "plan-2"}})
+
+    called = [m.name for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert "get_customer_orders" not in called
+    assert result["messages"][-1].content == scenario.final
+    assert llm.call_log == ["planner", "agent"]
+
+
+@pytest.mark.asyncio
+async def test_plan_mode_keeps_actions_behind_approval():
+    """Test that side effects are left to the agent and still interrupt for approval."""
+    scenario = find_scenario("Process a refund for Bob Gold's order ORD_102.")
+    graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=ScriptedChatModel(latency=0), step_delay=0, mode="plan")
+    config = {"configurable": {"thread_id": "plan-3"}}
+
+    await graph.ainvoke({"messages": [("user", scenario.prompt)]}, config)
+
+    state = graph.get_state(config)
+    assert state.next == ("tools",)
+    assert state.values["messages"][-1].tool_calls[0]["name"] == "action_process_refund"
+
+
+@pytest.mark.asyncio
+async def test_plan_mode_drops_planned_actions():
+    """Edge Case: An `action_` step in a plan is never executed by the executor."""
+    scenario = SCENARIOS[-1]
+    original = scenario.plan
+    scenario.plan = original + [{"id": "s9", "tool": "action_process_refund",
+                                 "args": {"order_id": "ORD_102", "reason": "x"}}]
+    try:
+        graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=ScriptedChatModel(latency=0), step_delay=0, mode="plan")
+        result = await run_ticket(graph, scenario.prompt, {"configurable": {"thread_id": "plan-4"}})
+    finally:
+        scenario.plan = original
+
+    called = [m.name for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert "action_process_refund" not in called
+    assert result["messages"][-1].content == scenario.final
+
+
+@pytest.mark.asyncio
+async def test_failed_leaf_step_keeps_the_plan():
+    """Edge Case: A "not found" from a step nothing depends on neither stops other steps nor re-plans."""
+    scenario = find_scenario("Check the stock for Sapphire Necklace and tell me if Alice Diamond is a VIP.")
+    original = scenario.plan
+    scenario.plan = [
+        {"id": "s1", "tool": "check_inventory", "args": {"item_name": "Ruby Ring"}},
+        {"id": "s2", "tool": "get_customer_profile", "args": {"name": "Bob Gold"}},
+        {"id": "s3", "tool": "get_customer_orders", "args": {"customer_id": "{s2.ID}"}, "depends_on": ["s2"]},
+    ]
+    try:
+        llm = ScriptedChatModel(latency=0)
+        graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=llm, step_delay=0, mode="plan")
+        result = await run_ticket(graph, scenario.prompt, {"configurable": {"thread_id": "plan-5"}})
+    finally:
+        scenario.plan = original
+
+    called = [m.name for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert called == ["check_inventory", "get_customer_profile", "get_customer_orders"]
+    assert llm.call_log == ["planner", "agent"]
+
+
+@pytest.mark.asyncio
+async def test_failed_step_with_dependents_replans():
+    """Edge Case: When a failed step had dependents, they are skipped and the planner gets another go."""
+    scenario = find_scenario("Check the stock for Sapphire Necklace and tell me if Alice Diamond is a VIP.")
+    original = scenario.plan
+    scenario.plan = [
+        {"id": "s1", "tool": "check_inventory", "args": {"item_name": "Ruby Ring"}},
+        {"id": "s2", "tool": "policy_lookup", "args": {"query": "{s1.Location}"}, "depends_on": ["s1"]},
+        {"id": "s3", "tool": "get_current_date", "args": {}},
+    ]
+    try:
+        llm = ScriptedChatModel(latency=0)
+        graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=llm, step_delay=0, mode="plan")
+        result = await run_ticket(graph, scenario.prompt, {"configurable": {"thread_id": "plan-6"}})
+    finally:
+        scenario.plan = original
+
+    called = [m.name for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert called == ["check_inventory", "get_current_date"]
+    assert llm.call_log == ["planner", "planner", "agent"]
@@ -0,0 +1,253 @@
+import asyncio
+import sys
+import os
+import time
+import pytest
+from langchain_core.tools import StructuredTool, ToolException
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.resilience import CircuitBreaker, ResilientTool, ServerSupervisor, CLOSED, OPEN, HALF_OPEN
+
+
+def make_tool(name: str, behaviour) -> StructuredTool:
+    """Builds an async tool whose n-th call runs behaviour(n)."""
+    calls = {"n": 0}
+
+    async def call(order_id: str) -> str:
+        calls["n"] += 1
+        return await behaviour(calls["n"])
+
+    tool = StructuredTool.from_function(coroutine=call, name=name, description="Test tool.")
+    tool.metadata = {"calls": calls}
+    return tool
+
+
+def wrap(tool, breaker=None, timeout=1.0, hedge_delay=0.1) -> ResilientTool:
+    return ResilientTool(tool, "oms", breaker or CircuitBreaker("oms"), timeout=timeout, hedge_delay=hedge_delay)
+
+
+# --- CIRCUIT BREAKER ---
+
+def test_breaker_opens_after_threshold():
+    """Test that consecutive failures open the circuit."""
+    opened = []
+    breaker = CircuitBreaker("crm", failure_threshold=2, on_open=opened.append)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert opened == ["crm"]
+
+
+def test_breaker_half_open_recovery():
+    """Test that a successful trial call after the cool-down closes the circuit."""
+    breaker = CircuitBreaker("crm", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_breaker_half_open_failure_reopens():
+    """Negative: A failed trial call opens the circuit again."""
+    breaker = CircuitBreaker("crm", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_breaker_half_open_trial_expires():
+    """Edge Case: A trial call that never reports back does not keep the circuit half-open forever."""
+    breaker = CircuitBreaker("crm", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.02)
+    assert breaker.allow()
+
+
+# --- RESILIENT TOOL ---
+
+@pytest.mark.asyncio
+async def test_healthy_call_passes_through():
+    """Test that a fast tool result is returned unchanged."""
+    async def ok(n):
+        return "Order ORD_102\\nStatus: PROCESSING"
+
+    result = await wrap(make_tool("get_order_details", ok)).ainvoke({"order_id": "ORD_102"})
+    assert "PROCESSING" in result
+
+
+@pytest.mark.asyncio
+async def test_hung_server_returns_unavailable_fast():
+    """CRITICAL: A hanging server yields SERVICE_UNAVAILABLE at the deadline instead of freezing."""
+    async def hang(n):
+        await asyncio.sleep(60)
+
+    start = time.perf_counter()
+    result = await wrap(make_tool("get_order_details", hang), timeout=0.3).ainvoke({"order_id": "ORD_102"})
+
+    assert time.perf_counter() - start < 1.0
+    assert "SERVICE_UNAVAILABLE" in result
+    assert "OMS" in result
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged():
+    """Test that a slow first attempt is raced by a hedged second attempt."""
+    async def first_slow(n):
+        if n == 1:
+            await asyncio.sleep(60)
+        return f"attempt {n}"
+
+    tool = make_tool("get_order_details", first_slow)
+    start = time.perf_counter()
+    result = await wrap(tool, hedge_delay=0.05).ainvoke({"order_id": "ORD_102"})
+
+    assert result == "attempt 2"
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_crashed_read_is_retried_immediately():
+    """Test that a failed read is retried without waiting for the hedge delay."""
+    async def crash_once(n):
+        if n == 1:
+            raise ConnectionError("server process died")
+        return "ok"
+
+    result = await wrap(make_tool("check_inventory", crash_once), hedge_delay=10).ainvoke({"order_id": "x"})
+    assert result == "ok"
+
+
+@pytest.mark.asyncio
+async def test_action_tools_are_not_retried():
+    """CRITICAL: Side-effect tools run once, and a failure is reported as an unknown outcome."""
+    async def crash(n):
+        raise ConnectionError("server process died")
+
+    tool = make_tool("action_process_refund", crash)
+    result = await wrap(tool).ainvoke({"order_id": "ORD_102"})
+
+    assert tool.metadata["calls"]["n"] == 1
+    assert "UNKNOWN" in result
+    assert "Do NOT retry" in result
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    """Test that calls are not attempted while the circuit is open."""
+    async def crash(n):
+        raise ConnectionError("down")
+
+    breaker = CircuitBreaker("oms", failure_threshold=1, reset_timeout=60)
+    tool = make_tool("get_order_details", crash)
+    await wrap(tool, breaker).ainvoke({"order_id": "ORD_102"})
+    calls_before = tool.metadata["calls"]["n"]
+
+    result = await wrap(tool, breaker).ainvoke({"order_id": "ORD_102"})
+    assert "SERVICE_UNAVAILABLE" in result
+    assert tool.metadata["calls"]["n"] == calls_before
+
+
+@pytest.mark.asyncio
+async def test_tool_errors_are_not_outages():
+    """Edge Case: Application errors from a healthy server propagate and keep the circuit closed."""
+    async def app_error(n):
+        raise ToolException("Order ID not found.")
+
+    breaker = CircuitBreaker("oms", failure_threshold=1)
+    tool = wrap(make_tool("get_order_details", app_error), breaker)
+    tool.handle_tool_error = True
+    result = await tool.ainvoke({"order_id": "ORD_404"})
+
+    assert "Order ID not found" in result
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_releases_breaker():
+    """Edge Case: Cancelling the half-open trial call lets the next call try again right away."""
+    async def hang(n):
+        await asyncio.sleep(60)
+
+    breaker = CircuitBreaker("oms", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    task = asyncio.ensure_future(wrap(make_tool("get_order_details", hang), breaker, timeout=30).ainvoke(
+        {"order_id": "ORD_102"}))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert breaker.allow()
+
+
+def test_sync_invocation():
+    """Test that the wrapper also works for sync callers, although MCP tools are async-only."""
+    async def ok(n):
+        return "Order ORD_102: SHIPPED"
+
+    assert wrap(make_tool("get_order_details", ok)).invoke({"order_id": "ORD_102"}) == "Order ORD_102: SHIPPED"
+
+
+# --- SUPERVISOR ---
+
+def test_supervisor_restarts_crashed_process():
+    """Test that an exited server process is relaunched."""
+    supervisor = ServerSupervisor(
+        {"crm": [sys.executable, "-c", "import time; time.sleep(60)"]},
+        check_interval=0.05, restart_backoff=0,
+    )
+    supervisor.start()
+    try:
+        first = supervisor.processes["crm"]
+        first.kill()
+        deadline = time.time() + 5
+        while supervisor.processes["crm"] is first and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert supervisor.processes["crm"] is not first
+        assert supervisor.processes["crm"].poll() is None
+        assert supervisor.restarts["crm"] == 1
+    finally:
+        supervisor.stop()
+
+
+def test_supervisor_manual_restart():
+    """Test that a stuck server can be restarted on demand (e.g. when its circuit opens)."""
+    supervisor = ServerSupervisor({"oms": [sys.executable, "-c", "import time; time.sleep(60)"]}, check_interval=60)
+    supervisor.start()
+    try:
+        first = supervisor.processes["oms"]
+        supervisor.restart("oms")
+        assert first.poll() is not None
+        assert supervisor.processes["oms"].poll() is None
+    finally:
+        supervisor.stop()
+
+
+def test_supervisor_gives_up_on_crash_loop():
+    """Negative: A server that dies right after every start (e.g. port in use) is not respawned forever."""
+    supervisor = ServerSupervisor({"crm": [sys.executable, "-c", "raise SystemExit(1)"]},
+                                  check_interval=0.05, restart_backoff=0, max_quick_exits=3)
+    supervisor.start()
+    try:
+        deadline = time.time() + 5
+        while "crm" not in supervisor.given_up and time.time() < deadline:
+            time.sleep(0.05)
+        restarts = supervisor.restarts["crm"]
+        time.sleep(0.3)
+
+        assert "crm" in supervisor.given_up
+        assert supervisor.restarts["crm"] == restarts == 2
+    finally:
+        supervisor.stop()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp.server.fastmcp import FastMCP
+
+from app.agents.agent import get_server_connection, SERVER_DIR
+from app.mcp_servers.serving import threaded_tool
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_threaded_tool_stays_callable():
+    """Test that the decorated function is still a plain sync function."""
+    mcp = FastMCP("Test")
+
+    @threaded_tool(mcp)
+    def echo(text: str) -> str:
+        """Echo the text."""
+        return text
+
+    assert echo("hi") == "hi"
+
+
+@pytest.mark.asyncio
+async def test_threaded_tools_run_concurrently():
+    """Test that slow sync tools no longer block each other on the event loop."""
+    mcp = FastMCP("Test")
+
+    @threaded_tool(mcp)
+    def slow(n: int) -> str:
+        """Sleep a little."""
+        time.sleep(0.2)
+        return str(n)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[mcp.call_tool("slow", {"n": i}) for i in range(5)])
+    assert time.perf_counter() - start < 0.8
+
+
+def test_server_connection_defaults_to_stdio(monkeypatch):
+    """Test that the default connection spawns the server script."""
+    monkeypatch.delenv("MCP_TRANSPORT", raising=False)
+    conn = get_server_connection("crm")
+    assert conn["transport"] == "stdio"
+    assert conn["args"][0].endswith("server_crm.py")
+
+
+def test_server_connection_http(monkeypatch):
+    """Test HTTP addressing with and without an explicit URL override."""
+    monkeypatch.setenv("MCP_TRANSPORT", "streamable_http")
+    assert get_server_connection("oms")["url"] == "http://127.0.0.1:8002/mcp"
+    monkeypatch.setenv("MCP_OMS_URL", "http://oms.internal:9000/mcp")
+    assert get_server_connection("oms")["url"] == "http://oms.internal:9000/mcp"
+
+
+@pytest.mark.asyncio
+async def test_http_server_serves_concurrent_sessions():
+    """Test that several clients share one networked CRM server."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "server_crm.py"), "--transport", "streamable-http", "--port", str(port)],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        url = f"http://127.0.0.1:{port}/mcp"
+        clients = [MultiServerMCPClient({"crm": {"transport": "streamable_http", "url": url}}) for _ in range(3)]
+        tool_lists = await asyncio.gather(*[c.get_tools() for c in clients])
+
+        calls = [tools[0].ainvoke({"name": name}) for tools, name in zip(tool_lists, ["Diamond", "Bob", "Alice"])]
+        results = [str(r) for r in await asyncio.gather(*calls)]
+
+        assert "CUST_001" in results[0]
+        assert "CUST_002" in results[1]
+        assert "AMBIGUOUS_MATCH" in results[2]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def test_terminated_http_server_removes_its_database(tmp_path):
+    """Edge Case: SIGTERM (as sent by the supervisor) still removes the server's temporary database."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "server_crm.py"), "--transport", "streamable-http", "--port", str(port)],
+        env={**os.environ, "TMPDIR": str(tmp_path)},
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        assert [p.name for p in tmp_path.iterdir() if p.name.startswith("crm_")]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    assert proc.returncode == 0
+    assert not [p.name for p in tmp_path.iterdir() if p.name.startswith("crm_")]
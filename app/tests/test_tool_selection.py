@@ -0,0 +1,90 @@
+import sys
+import os
+from unittest.mock import MagicMock
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.agent import build_graph
+from app.agents.tool_selection import ToolSelector, customer_resolved, policy_checked
+from app.mcp_servers.server_crm import get_customer_profile
+from app.tests.fake_tools import FAKE_TOOLS
+
+LOOKUPS = ["check_inventory", "get_current_date", "get_customer_orders", "get_customer_profile",
+           "get_order_details", "policy_lookup"]
+
+
+def tool_result(name, content):
+    return ToolMessage(content=content, name=name, tool_call_id=f"call_{name}")
+
+
+def names(tools):
+    return sorted(t.name for t in tools)
+
+
+def test_new_ticket_gets_lookups_only():
+    """Test that neither Comms tools nor refunds are offered before a customer and policy are known."""
+    selector = ToolSelector(MagicMock(), FAKE_TOOLS)
+    assert names(selector.select([HumanMessage(content="Email Bob about his refund.")])) == LOOKUPS
+
+
+def test_tools_unlock_with_state():
+    """Test that a resolved customer unlocks Comms, including sending email, and a policy check unlocks refunds."""
+    selector = ToolSelector(MagicMock(), FAKE_TOOLS)
+    messages = [HumanMessage(content="Refund Bob and email him."),
+                tool_result("get_customer_profile", "ID: CUST_002 | Name: Bob Gold")]
+    assert names(selector.select(messages)) == sorted(LOOKUPS + ["action_send_email_to_customer",
+                                                                 "get_message_status"])
+
+    messages.append(tool_result("policy_lookup", "Returns allowed within 30 days of purchase."))
+    assert names(selector.select(messages)) == names(FAKE_TOOLS)
+
+
+def test_policy_alone_unlocks_refunds_only():
+    """Edge Case: A policy lookup without a resolved customer unlocks refunds but not Comms tools."""
+    selector = ToolSelector(MagicMock(), FAKE_TOOLS)
+    messages = [HumanMessage(content="What is the refund policy?"), tool_result("policy_lookup", "30 days.")]
+    assert names(selector.select(messages)) == sorted(LOOKUPS + ["action_process_refund"])
+
+
+def test_ambiguous_customer_is_not_resolved():
+    """Edge Case: An AMBIGUOUS_MATCH lookup does not unlock Comms tools, a customer ID from the user does."""
+    ambiguous = get_customer_profile("Alice")  # lists "Alice Diamond (ID: CUST_001), Alice Silver (ID: CUST_999)"
+    assert "ID: CUST_001" in ambiguous
+    assert not customer_resolved([tool_result("get_customer_profile", ambiguous)])
+    # MCP tools return content blocks
+    blocks = [{"type": "text", "text": get_customer_profile("Bob")}]
+    assert customer_resolved([tool_result("get_customer_profile", blocks)])
+    assert customer_resolved([HumanMessage(content="Add a note to CUST_001.")])
+    assert not policy_checked([HumanMessage(content="What is the return policy?")])
+
+
+def test_bindings_are_cached_and_savings_reported():
+    """Test that each tool subset is bound once and the saved schema tokens are counted per call."""
+    llm = MagicMock()
+    selector = ToolSelector(llm, FAKE_TOOLS)
+    first = [HumanMessage(content="Hi")]
+
+    bound_a, saved_a = selector.bind(first)
+    bound_b, saved_b = selector.bind(first + [AIMessage(content="Hello!"), HumanMessage(content="Thanks")])
+    _, saved_full = selector.bind(first + [tool_result("policy_lookup", "ok"),
+                                           tool_result("get_customer_profile", "ID: CUST_002 | Name: Bob Gold")])
+
+    assert bound_a is bound_b
+    assert llm.bind_tools.call_count == 2
+    assert saved_a == saved_b > 0
+    assert saved_full == 0
+    assert selector.tokens_saved == 2 * saved_a
+
+
+def test_graph_binds_pruned_tools():
+    """Test that the agent node offers only the selected tools, while the ToolNode can still run any."""
+    llm = MagicMock()
+    llm.bind_tools.return_value.invoke.return_value = AIMessage(content="How can I help?")
+    graph = build_graph(FAKE_TOOLS, MemorySaver(), llm=llm, step_delay=0)
+
+    graph.invoke({"messages": [("user", "Hi")]}, {"configurable": {"thread_id": "prune-1"}})
+
+    bound = llm.bind_tools.call_args.args[0]
+    assert names(bound) == LOOKUPS